@@ -2,17 +2,22 @@
 ''' The curver kernel. '''
 
 from .arc import Arc, MultiArc  # noqa: F401
+from .batch import LaminationBatch  # noqa: F401
+from .compact import CompactEncoding  # noqa: F401
+from .compiled import CompiledEncoding  # noqa: F401
 from .crush import Crush, LinearTransformation, Lift  # noqa: F401
 from .curve import Curve, MultiCurve  # noqa: F401
 from .curvegraph import CurveGraph  # noqa: F401
 from .encoding import Encoding, Mapping, MappingClass  # noqa: F401
 from .finite import FiniteSubgroup  # noqa: F401
+from .flipgraph import ModularFlipGraph  # noqa: F401
 from .homology import HomologyClass  # noqa: F401
-from .lamination import Lamination, IntegralLamination  # noqa: F401
+from .lamination import Lamination, IntegralLamination, intersection_matrix  # noqa: F401
 from .mappingclassgroup import MappingClassGroup  # noqa: F401
 from .moves import Move, FlipGraphMove, Isometry, EdgeFlip, MultiEdgeFlip  # noqa: F401
 from .permutation import Permutation  # noqa: F401
-from .structures import UnionFind, StraightLineProgram  # noqa: F401
+from .projective import ProjectiveLamination  # noqa: F401
+from .structures import UnionFind, IntegerUnionFind, BucketQueue, Rope, StraightLineProgram  # noqa: F401
 from .triangulation import Edge, Triangle, Triangulation, norm  # noqa: F401
 from .twist import Twist, HalfTwist  # noqa: F401
 from . import create  # noqa: F401
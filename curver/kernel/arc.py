@@ -10,6 +10,9 @@ from curver.kernel.decorators import memoize, topological_invariant  # Special i
 
 class MultiArc(IntegralLamination):
     ''' An IntegralLamination in which every component is an Arc. '''
+    
+    __slots__ = []
+    
     def is_short(self):
         return all(weight <= 0 for weight in self)
     
@@ -76,12 +79,11 @@ class MultiArc(IntegralLamination):
         
         short, conjugator = self.shorten()
         
-        triangulations = set()
-        for encoding in short.triangulation.all_encodings(radius):
-            T = encoding.target_triangulation.as_lamination()
-            triangulations.add(conjugator.inverse()(encoding.inverse()(T)))
+        # Two encodings reach the same triangulation of the surface if and only if they pull it back to the same multiarc.
+        pullback = lambda encoding: encoding.inverse()(encoding.target_triangulation.as_lamination())
         
-        return triangulations
+        conjugator_inv = conjugator.inverse()
+        return set(conjugator_inv(pullback(encoding)) for encoding in short.triangulation.explore(radius, key=pullback))
     
     def all_disjoint_arcs(self):
         ''' Yield all arcs that are disjoint from this multiarc.
@@ -124,7 +126,8 @@ class MultiArc(IntegralLamination):
         
         G = networkx.Graph()
         G.add_nodes_from(arcs)
-        G.add_edges_from([(a_1, a_2) for a_1, a_2 in combinations(arcs, r=2) if a_1.intersection(a_2) == 0])
+        M = curver.kernel.intersection_matrix(arcs)
+        G.add_edges_from([(arcs[i], arcs[j]) for i, j in combinations(range(len(arcs)), r=2) if M[i, j] == 0])
         
         for clique in networkx.enumerate_all_cliques(G):
             yield self.triangulation.disjoint_sum(clique)
@@ -140,13 +143,17 @@ class MultiArc(IntegralLamination):
         
         G = networkx.Graph()
         G.add_nodes_from(arcs)
-        G.add_edges_from([(a_1, a_2) for a_1, a_2 in combinations(arcs, r=2) if a_1.intersection(a_2) == 0])
+        M = curver.kernel.intersection_matrix(arcs)
+        G.add_edges_from([(arcs[i], arcs[j]) for i, j in combinations(range(len(arcs)), r=2) if M[i, j] == 0])
         
         for clique in networkx.find_cliques(G):
             yield self.triangulation.disjoint_sum(clique)
 
 class Arc(MultiArc):
     ''' A MultiArc with a single component. '''
+    
+    __slots__ = []
+    
     @memoize
     def components(self):
         return {self: 1}
@@ -0,0 +1,117 @@
+
+''' A module for representing many laminations on the same triangulation at once.
+
+Moves can map all of the laminations in a LaminationBatch in one go using array operations,
+which is much faster than mapping each lamination individually.
+
+Whenever possible the weights are stored in an int64 array. Before each move we check that
+none of the values that it computes can overflow and, if they might, we switch to an array
+of Python integers. Hence the results are always exactly the same as mapping the laminations
+individually. '''
+
+import numpy as np
+
+import curver
+
+# If every weight has absolute value less than SAFE then none of the expressions in flip_weights can overflow an int64.
+# The largest of these is ai0 + di0 - 2*ei which has absolute value less than 4 * SAFE = 2**62.
+SAFE = 2**60
+
+def fits(weights, scale=1):
+    ''' Return whether every entry of the int64 array weights multiplied by scale has absolute value less than SAFE. '''
+    
+    if weights.size == 0:
+        return True
+    
+    return max(-int(weights.min()), int(weights.max())) * scale < SAFE
+
+def widen(weights, columns=None, scale=1):
+    ''' Return the array weights, converted to an array of Python integers if it is an int64 array
+    and scale times the entries in the given columns (default all) might not fit within SAFE. '''
+    
+    if weights.dtype == object or fits(weights if columns is None else weights[:, columns], scale):
+        return weights
+    
+    return weights.astype(object)
+
+def flip_weights(ei, ai0, bi0, ci0, di0):
+    ''' Return the weights of the new edge after flipping an edge of weight ei in a square with (corrected) weights ai0, bi0, ci0 & di0.
+    
+    The arguments are arrays and so this evaluates all of the cases of Lemma 5.1.3 of [Bell15]_ at once.
+    The cases are checked in the same order as in curver.kernel.moves.flip_weight and the first one that applies is used. '''
+    
+    conditions = [
+        (ei >= ai0 + bi0) & (ai0 >= di0) & (bi0 >= ci0),  # CASE: A(ab)
+        (ei >= ci0 + di0) & (di0 >= ai0) & (ci0 >= bi0),  # CASE: A(cd)
+        (ei <= 0) & (ai0 >= bi0) & (di0 >= ci0),  # CASE: D(ad)
+        (ei <= 0) & (bi0 >= ai0) & (ci0 >= di0),  # CASE: D(bc)
+        (ei >= 0) & (ai0 >= bi0 + ei) & (di0 >= ci0 + ei),  # CASE: N(ad)
+        (ei >= 0) & (bi0 >= ai0 + ei) & (ci0 >= di0 + ei),  # CASE: N(bc)
+        (ai0 + bi0 >= ei) & (bi0 + ei >= 2*ci0 + ai0) & (ai0 + ei >= 2*di0 + bi0),  # CASE: N(ab)
+        (ci0 + di0 >= ei) & (di0 + ei >= 2*ai0 + ci0) & (ci0 + ei >= 2*bi0 + di0),  # CASE: N(cd)
+        ]
+    choices = [
+        ai0 + bi0 - ei,
+        ci0 + di0 - ei,
+        ai0 + di0 - ei,
+        bi0 + ci0 - ei,
+        ai0 + di0 - 2*ei,
+        bi0 + ci0 - 2*ei,
+        (ai0 + bi0 - ei) // 2,  # In this case ai0 + bi0 - ei is even.
+        (ci0 + di0 - ei) // 2,  # In this case ci0 + di0 - ei is even.
+        ]
+    
+    return np.select(conditions, choices, np.maximum(ai0 + ci0, bi0 + di0) - ei)
+
+class LaminationBatch:
+    ''' This represents a sequence of integral laminations on the same triangulation.
+    
+    The weights are stored as an N x zeta array so row i is the geometric vector of the i-th lamination.
+    This is an int64 array when the weights are small enough and an array of Python integers otherwise.
+    Mapping a batch through a Move or Encoding maps each lamination in it. '''
+    def __init__(self, triangulation, geometric):
+        assert isinstance(triangulation, curver.kernel.Triangulation)
+        
+        self.triangulation = triangulation
+        self.zeta = self.triangulation.zeta
+        if isinstance(geometric, np.ndarray) and geometric.dtype in (np.int64, object):  # Already in the right form.
+            self.geometric = geometric.reshape(-1, self.zeta)
+        else:
+            self.geometric = np.array(geometric, dtype=object).reshape(-1, self.zeta)
+            if fits(self.geometric):
+                self.geometric = self.geometric.astype(np.int64)
+    
+    @classmethod
+    def from_laminations(cls, triangulation, laminations):
+        ''' Return a new LaminationBatch containing the given laminations, each of which must lie on triangulation. '''
+        
+        laminations = list(laminations)
+        assert all(lamination.triangulation == triangulation for lamination in laminations)
+        
+        return cls(triangulation, [lamination.geometric for lamination in laminations])
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return 'LaminationBatch of %d laminations on %s' % (len(self), self.triangulation)
+    def __len__(self):
+        return self.geometric.shape[0]
+    def __iter__(self):
+        return iter(self.laminations())
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return LaminationBatch(self.triangulation, self.geometric[item])
+        
+        return self.triangulation(self.geometric[item].tolist())
+    def __eq__(self, other):
+        if isinstance(other, LaminationBatch):
+            return self.triangulation == other.triangulation and np.array_equal(self.geometric, other.geometric)
+        else:
+            return NotImplemented
+    def __hash__(self):
+        return hash((self.triangulation, tuple(map(tuple, self.geometric.tolist()))))
+    
+    def laminations(self, promote=True):
+        ''' Return the list of laminations in this batch. '''
+        
+        return [self.triangulation(row, promote) for row in self.geometric.tolist()]
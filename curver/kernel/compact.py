@@ -0,0 +1,237 @@
+
+''' A module for representing long encodings without keeping all of their intermediate triangulations alive.
+
+Every EdgeFlip (and its inverse) refers to the triangulations before and after it and so a long Encoding
+holds on to one Triangulation per move. A CompactEncoding instead stores:
+ * the label of each flip in a packed array,
+ * the label map of each isometry and the labels of each MultiEdgeFlip as a tag together with a packed array,
+ * the power of each Twist (or HalfTwist) together with the weights of its curve (or arc) as a packed array, and
+ * any other moves, such as Crushes and Lifts, as they are. These cannot be rebuilt from a small amount of data
+   and so still keep their triangulations alive.
+It only keeps the triangulations at the boundaries between windows of (roughly) WINDOW moves. The moves of a
+window are rebuilt from the triangulation at its start whenever they are needed and the CACHE most recently
+used windows are kept around, so iterating through or applying the encoding only ever builds a few windows at once. '''
+
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+import curver
+
+WINDOW = 1024  # The (rough) number of moves between the triangulations that are kept.
+CACHE = 4  # The number of rebuilt windows to keep.
+OTHER = -2**62  # The entry of flips at a position that holds some other move. This is never the label of an edge.
+ISOMETRY, MULTIFLIP, TWIST, HALFTWIST, MOVE = range(5)  # The tags of the other moves.
+
+class CompactEncoding:
+    ''' This represents an Encoding whose moves are stored as packed arrays and rebuilt on demand.
+    
+    Users should create these via Encoding.compact(). '''
+    def __init__(self, flips, others, boundaries, window=WINDOW):
+        ''' flips is the packed array of flip labels (with OTHER at the positions of other moves) and others maps these
+        positions to pairs (tag, data) describing the move there, see from_moves. These are in the same order as Encoding.sequence.
+        
+        boundaries is a dictionary mapping some positions k to the triangulation that sequence[k:] maps to. That is,
+        the target triangulation of sequence[k] or the source triangulation of the encoding when k == len(sequence).
+        This must include 0 and len(sequence). Only enough of these are kept so that each window contains at least window moves. '''
+        
+        assert isinstance(flips, array)
+        assert 0 in boundaries and len(flips) in boundaries
+        
+        self.flips = flips
+        self.others = others
+        
+        self.window_size = window
+        self.starts = [0]
+        for position in sorted(boundaries):
+            if position - self.starts[-1] >= self.window_size:
+                self.starts.append(position)
+        if len(self.starts) > 1 and len(self) - self.starts[-1] < self.window_size:
+            self.starts.pop()  # Merge the last window into the one before.
+        self.starts.append(len(self))
+        self.boundaries = [boundaries[position] for position in self.starts]
+        
+        self.source_triangulation = self.boundaries[-1]
+        self.target_triangulation = self.boundaries[0]
+        self.zeta = self.source_triangulation.zeta
+        self._windows = OrderedDict()  # Mapping index --> list of moves, see window.
+        self._compiled = None  # See compile.
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return 'CompactEncoding of %d moves from %s to %s' % (len(self), self.source_triangulation, self.target_triangulation)
+    def __len__(self):
+        return len(self.flips)
+    def __reduce__(self):
+        return (self.__class__, (self.flips, self.others, dict(zip(self.starts, self.boundaries)), self.window_size))
+    def __iter__(self):
+        for index in range(len(self.boundaries) - 1):
+            yield from self.window(index)
+    def __reversed__(self):
+        for index in reversed(range(len(self.boundaries) - 1)):
+            yield from reversed(self.window(index))
+    def __getitem__(self, value):
+        if isinstance(value, curver.IntegerType):
+            if value < 0: value += len(self)
+            if not 0 <= value < len(self):
+                raise IndexError('list index out of range')
+            
+            index = bisect_right(self.starts, value) - 1
+            return self.window(index)[value - self.starts[index]]
+        else:
+            return NotImplemented
+    
+    def window(self, index):
+        ''' Return the list of moves between the index-th and index+1-st boundaries.
+        
+        These are rebuilt from the packed arrays, unless this window is in the cache. '''
+        
+        if index in self._windows:
+            self._windows.move_to_end(index)
+            return self._windows[index]
+        
+        T = self.boundaries[index+1]
+        moves_reversed = []
+        for position in reversed(range(self.starts[index], self.starts[index+1])):
+            label = self.flips[position]
+            if label != OTHER:
+                move = T.encode_flip(label)[0]
+            else:
+                tag, data = self.others[position]
+                if tag == ISOMETRY:
+                    move = T.encode_relabel_edges(list(data))[0]
+                elif tag == MULTIFLIP:
+                    move = T.encode_multiflip(list(data))[0]
+                elif tag == TWIST:
+                    power, weights = data
+                    move = curver.kernel.Twist(curver.kernel.Curve(T, list(weights)), power)
+                elif tag == HALFTWIST:
+                    power, weights = data
+                    move = curver.kernel.HalfTwist(curver.kernel.Arc(T, list(weights)), power)
+                else:  # tag == MOVE:
+                    move = data
+            moves_reversed.append(move)
+            T = move.target_triangulation
+        assert T == self.boundaries[index]
+        
+        self._windows[index] = moves_reversed[::-1]
+        if len(self._windows) > CACHE:
+            self._windows.popitem(last=False)
+        
+        return self._windows[index]
+    
+    def expand(self):
+        ''' Return the (ordinary) Encoding that this represents.
+        
+        This rebuilds every intermediate triangulation and so uses as much memory as the original Encoding. '''
+        
+        return curver.kernel.Encoding(list(self)).promote()
+    
+    def __call__(self, other):
+        ''' Return the image of other under this encoding.
+        
+        This rebuilds the moves one window at a time and so does not need every intermediate triangulation at once. '''
+        
+        if self.source_triangulation != other.triangulation:
+            raise ValueError('Cannot apply an Encoding to something on a triangulation other than source_triangulation')
+        
+        if self._compiled is not None and isinstance(other, (curver.kernel.Lamination, curver.kernel.LaminationBatch)):
+            return self._compiled(other)
+        
+        for index in reversed(range(len(self.boundaries) - 1)):
+            other = curver.kernel.Encoding(self.window(index))(other)
+        
+        return other
+    
+    def __mul__(self, other):
+        if isinstance(other, curver.kernel.Encoding):
+            other = other.compact()
+        
+        if isinstance(other, CompactEncoding):
+            if self.source_triangulation != other.target_triangulation:
+                raise ValueError('Cannot compose Encodings over different triangulations')
+            
+            return CompactEncoding.concatenate([self, other])
+        elif other is None:
+            return self
+        else:
+            return NotImplemented
+    def __rmul__(self, other):
+        if isinstance(other, curver.kernel.Encoding):
+            return other.compact() * self
+        else:
+            return NotImplemented
+    def __pow__(self, k):
+        if self.source_triangulation != self.target_triangulation:
+            raise ValueError('Cannot raise an Encoding that is not a MappingClass to a power')
+        
+        if k == 0:
+            return self.source_triangulation.id_encoding().compact()
+        elif k > 0:
+            return CompactEncoding.concatenate([self] * k)
+        else:
+            return self.inverse()**abs(k)
+    
+    def inverse(self):
+        ''' Return the inverse of this encoding.
+        
+        This is built one window at a time and so does not need every intermediate triangulation at once either. '''
+        
+        return CompactEncoding.from_moves((item.inverse() for item in reversed(self)), dict((len(self) - position, T) for position, T in zip(self.starts, self.boundaries)), self.window_size)
+    def __invert__(self):
+        return self.inverse()
+    
+    @classmethod
+    def from_moves(cls, sequence, boundaries, window=WINDOW):
+        ''' Return the CompactEncoding of the given iterable of moves, in the same order as Encoding.sequence.
+        
+        See CompactEncoding.__init__ for a description of boundaries and window. '''
+        
+        flips = array('q')
+        others = dict()
+        for position, item in enumerate(sequence):
+            if isinstance(item, curver.kernel.EdgeFlip):
+                flips.append(item.edge.label)
+            else:
+                flips.append(OTHER)
+                if isinstance(item, curver.kernel.Isometry):
+                    others[position] = (ISOMETRY, array('q', [item.label_map[index] for index in item.source_triangulation.indices]))
+                elif isinstance(item, curver.kernel.MultiEdgeFlip):
+                    others[position] = (MULTIFLIP, array('q', [edge.label for edge in item.edges]))
+                elif isinstance(item, curver.kernel.Twist):  # The curve is short and so has small weights, but the power can be arbitrarily large.
+                    others[position] = (TWIST, (item.power, array('q', item.curve.geometric)))
+                elif isinstance(item, curver.kernel.HalfTwist):
+                    others[position] = (HALFTWIST, (item.power, array('q', item.arc.geometric)))
+                else:
+                    others[position] = (MOVE, item)
+        
+        return cls(flips, others, boundaries, window)
+    
+    @classmethod
+    def concatenate(cls, encodings):
+        ''' Return the CompactEncoding of the composition of the given CompactEncodings.
+        
+        This just joins their packed arrays and so does not rebuild any moves. '''
+        
+        flips = array('q')
+        others = dict()
+        boundaries = dict()
+        for encoding in encodings:
+            offset = len(flips)
+            flips.extend(encoding.flips)
+            others.update((offset + position, item) for position, item in encoding.others.items())
+            boundaries.update((offset + position, T) for position, T in zip(encoding.starts, encoding.boundaries))
+        
+        return cls(flips, others, boundaries, encodings[0].window_size)
+    
+    def compile(self):
+        ''' Return a CompiledEncoding that applies this encoding to laminations much more quickly.
+        
+        The instructions of a CompiledEncoding are much smaller than the moves they come from and so
+        this does not need every intermediate triangulation either. '''
+        
+        if self._compiled is None:
+            self._compiled = curver.kernel.CompiledEncoding(self)
+        
+        return self._compiled
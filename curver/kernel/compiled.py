@@ -0,0 +1,111 @@
+
+''' A module for applying an Encoding quickly by first lowering it to a flat program.
+
+Applying an Encoding move by move builds a new Lamination after every move. Instead a CompiledEncoding
+records the encoding as a list of instructions that act on a plain list of weights:
+ * (FLIP, e, a, b, c, d) replaces weights[e] by the weight after flipping it in the square with sides a, b, c & d,
+ * (PERMUTE, indices) replaces weights by [weights[i] for i in indices], and
+ * (MOVE, move) applies any other move, by building a lamination and using move.apply_lamination.
+
+Isometries do not need to move any weights. The compiler instead tracks which slot holds each edge and
+renames the indices of later instructions, so only a single PERMUTE is needed at the end (and before each MOVE).
+Hence the weights are only turned back into a Lamination once the whole program has run. '''
+
+import numpy as np
+
+import curver
+
+FLIP, PERMUTE, MOVE = range(3)
+
+class CompiledEncoding:
+    ''' This represents an Encoding that has been lowered to a list of instructions.
+    
+    Users should create these via Encoding.compile(). '''
+    def __init__(self, encoding):
+        assert isinstance(encoding, (curver.kernel.Encoding, curver.kernel.CompactEncoding))
+        
+        self.encoding = encoding
+        self.source_triangulation = self.encoding.source_triangulation
+        self.target_triangulation = self.encoding.target_triangulation
+        self.zeta = self.encoding.zeta
+        
+        identity = list(range(self.zeta))
+        slots = identity  # slots[i] is the position in the list of weights that holds the weight of edge i.
+        self.instructions = []
+        for item in reversed(self.encoding):
+            for instruction in item.instructions():
+                opcode = instruction[0]
+                if opcode == FLIP:
+                    self.instructions.append((FLIP,) + tuple(slots[index] for index in instruction[1:]))
+                elif opcode == PERMUTE:
+                    slots = [slots[index] for index in instruction[1]]
+                else:  # opcode == MOVE:
+                    if slots != identity:
+                        self.instructions.append((PERMUTE, slots))
+                    self.instructions.append(instruction)
+                    identity = list(range(item.target_triangulation.zeta))  # The move might change the number of edges.
+                    slots = identity
+        if slots != identity:
+            self.instructions.append((PERMUTE, slots))
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return 'Compiled %s' % self.encoding
+    def __len__(self):
+        return len(self.instructions)
+    
+    def __call__(self, other):
+        ''' Return the image of other under this encoding.
+        
+        Laminations and LaminationBatches are mapped by running the program, anything else is passed to the encoding. '''
+        
+        if self.source_triangulation != other.triangulation:
+            raise ValueError('Cannot apply an Encoding to something on a triangulation other than source_triangulation')
+        
+        if isinstance(other, curver.kernel.Lamination):
+            return self.apply_lamination(other)
+        elif isinstance(other, curver.kernel.LaminationBatch):
+            return self.apply_lamination_batch(other)
+        else:
+            return self.encoding(other)
+    
+    def apply_lamination(self, lamination):
+        ''' Return the lamination obtained by running this program on the weights of the given lamination. '''
+        
+        weights = list(lamination.geometric)
+        kind = lamination.__class__
+        flip_weight = curver.kernel.moves.flip_weight
+        for instruction in self.instructions:
+            opcode = instruction[0]
+            if opcode == FLIP:
+                _, e, a, b, c, d = instruction
+                ai0, bi0, ci0, di0 = weights[a], weights[b], weights[c], weights[d]
+                weights[e] = flip_weight(weights[e], ai0 if ai0 > 0 else 0, bi0 if bi0 > 0 else 0, ci0 if ci0 > 0 else 0, di0 if di0 > 0 else 0)
+            elif opcode == PERMUTE:
+                weights = [weights[index] for index in instruction[1]]
+            else:  # opcode == MOVE:
+                move = instruction[1]
+                image = move.apply_lamination(kind(move.source_triangulation, weights))
+                weights, kind = list(image.geometric), image.__class__  # Some moves, such as Crush, change the class.
+        
+        return kind(self.target_triangulation, weights)  # Avoids promote.
+    
+    def apply_lamination_batch(self, batch):
+        ''' Return the LaminationBatch obtained by running this program on each row of the given LaminationBatch. '''
+        
+        weights = batch.geometric.copy()
+        for instruction in self.instructions:
+            opcode = instruction[0]
+            if opcode == FLIP:
+                _, e, a, b, c, d = instruction
+                weights = curver.kernel.batch.widen(weights, [e, a, b, c, d])  # Only the weights in the square matter.
+                ai0, bi0, ci0, di0 = [np.maximum(weights[:, index], 0) for index in [a, b, c, d]]
+                weights[:, e] = curver.kernel.batch.flip_weights(weights[:, e], ai0, bi0, ci0, di0)
+            elif opcode == PERMUTE:
+                weights = weights[:, instruction[1]]
+            else:  # opcode == MOVE:
+                move = instruction[1]
+                weights = move.apply_lamination_batch(curver.kernel.LaminationBatch(move.source_triangulation, weights)).geometric
+        
+        return curver.kernel.LaminationBatch(self.target_triangulation, weights)
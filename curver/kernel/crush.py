@@ -134,8 +134,11 @@ class Crush(Move):
     def apply_homology(self, homology_class):
         return NotImplemented  # I don't think we ever need this.
     
+    def apply_projective(self, lamination):
+        raise TypeError('Crushing requires the exact weights of a lamination')
+    
     def package(self):
-        return (self.curve.parallel(), 0)
+        return (self.curve.parallel().label, 0)
 
 class LinearTransformation(Move):
     ''' This represents a linear transformation between two triangulations. '''
@@ -144,6 +147,15 @@ class LinearTransformation(Move):
         assert matrix.shape == (target_triangulation.zeta, source_triangulation.zeta)
         
         self.matrix = matrix
+        # For applying this to a LaminationBatch with int64 weights we need to know how much it can scale them by.
+        # This only makes sense when every entry is an integer, the matrix of a Pachner move contains utilities.half for example.
+        rows = self.matrix.tolist()
+        if all(isinstance(entry, curver.IntegerType) for row in rows for entry in row):
+            self._scale = max([sum(abs(entry) for entry in row) for row in rows], default=0)
+            self._int64_matrix = self.matrix.astype(np.int64) if self._scale < curver.kernel.batch.SAFE else None
+        else:
+            self._scale = None
+            self._int64_matrix = None
     
     def __str__(self):
         return 'LT to %s' % self.target_triangulation
@@ -157,6 +169,20 @@ class LinearTransformation(Move):
     def apply_lamination(self, lamination):
         return self.target_triangulation(self.matrix.dot(lamination.geometric).tolist())
     
+    def apply_lamination_batch(self, batch):
+        if self._int64_matrix is None:  # Fall back to Python arithmetic.
+            return curver.kernel.LaminationBatch(self.target_triangulation, batch.geometric.astype(object).dot(self.matrix.T))
+        
+        weights = curver.kernel.batch.widen(batch.geometric, scale=self._scale)
+        if weights.dtype == object:
+            return curver.kernel.LaminationBatch(self.target_triangulation, weights.dot(self.matrix.T))
+        
+        return curver.kernel.LaminationBatch(self.target_triangulation, weights.dot(self._int64_matrix.T))
+    
+    def apply_projective(self, lamination):
+        geometric = self.matrix.dot(lamination.geometric).tolist()
+        return curver.kernel.ProjectiveLamination(self.target_triangulation, geometric, lamination.log_scale)
+    
     def apply_homology(self, homology_class):
         return NotImplemented  # I don't think we ever need this.
 
@@ -176,4 +202,8 @@ class Lift(LinearTransformation):
         assert all(lamination(edge) >= 0 and lamination.left_weight(edge) >= 0 for vertex in self.vertices for edge in vertex)
         
         return super().apply_lamination(lamination)
-
+    
+    def apply_lamination_batch(self, batch):
+        assert all(lamination(edge) >= 0 and lamination.left_weight(edge) >= 0 for lamination in batch.laminations(promote=False) for vertex in self.vertices for edge in vertex)
+        
+        return super().apply_lamination_batch(batch)
@@ -12,6 +12,9 @@ from curver.kernel.decorators import memoize, topological_invariant  # Special i
 
 class MultiCurve(IntegralLamination):
     ''' An IntegralLamination in which every component is a Curve. '''
+    
+    __slots__ = []
+    
     def boundary(self):
         return 2*self
     def is_filling(self):
@@ -106,6 +109,9 @@ class MultiCurve(IntegralLamination):
 
 class Curve(MultiCurve):
     ''' A MultiCurve with a single component. '''
+    
+    __slots__ = []
+    
     @memoize
     def components(self):
         return {self: 1}
@@ -143,7 +149,8 @@ class Curve(MultiCurve):
         This is a Fraction that increases by one each time a right Dehn twist about
         this curve is performed unless -1 <= slope <= 1.
         
-        This curve must be non-peripheral and intersect the given lamination. '''
+        This curve must be non-peripheral and intersect the given lamination.
+        If the lamination has non-integral weights then this is a float instead. '''
         
         assert isinstance(lamination, curver.kernel.Lamination)
         
@@ -171,6 +178,9 @@ class Curve(MultiCurve):
         
         sign = -1 if short_lamination.left_weight(a) - around_v > 0 or short_lamination.right_weight(a) < 0 else +1
         
+        if not isinstance(numerator, curver.IntegerType) or not isinstance(denominator, curver.IntegerType):  # Real weights, such as those of a ProjectiveLamination.
+            return sign * numerator / denominator
+        
         return Fraction(sign * numerator, denominator)  # + (1 if sign < 0 and not short.is_isolating() else 0)  # Curver is right biased on non-isolating curves.
     
     def relative_twisting(self, b, c):
@@ -229,7 +239,7 @@ class Curve(MultiCurve):
         edge_map[e] = curver.kernel.Edge(~b.label)
         edge_map[~b] = curver.kernel.Edge(e.label)
         
-        new_triangulation = curver.kernel.Triangulation([curver.kernel.Triangle([edge_map[edgy] for edgy in triangle]) for triangle in short.triangulation])
+        new_triangulation = curver.kernel.Triangulation([curver.kernel.Triangle([edge_map[edgy] for edgy in triangle]) for triangle in short.triangulation]).interned()
         
         # Build the lifting matrix back.
         v = short.triangulation.vertex_lookup[a]  # = short.triangulation.vertex_lookup[~a].
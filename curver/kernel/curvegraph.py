@@ -128,7 +128,8 @@ class CurveGraph:
         
         # Build graph.
         vertices = list(self.all_tight_geodesic_multicurves(a, b))
-        edges = [(u, v) for u, v in combinations(vertices, r=2) if u.intersection(v) == 0 and u.no_common_component(v)]
+        M = curver.kernel.intersection_matrix(vertices)
+        edges = [(vertices[i], vertices[j]) for i, j in combinations(range(len(vertices)), r=2) if M[i, j] == 0 and vertices[i].no_common_component(vertices[j])]
         G = networkx.Graph(edges)
         
         geodesic = networkx.algorithms.shortest_path(G, a, b)  # Find a geodesic from self to other, however this might not be tight.  # pylint: disable=too-many-function-args
@@ -11,7 +11,7 @@ def memoize(function, *args, **kwargs):
     inputs = inspect.getcallargs(function, *args, **kwargs)  # pylint: disable=deprecated-method
     self = inputs.pop('self', function)  # We test whether function is a method by looking for a `self` argument. If not we store the cache in the function itself.
     
-    if not hasattr(self, '_cache'):
+    if getattr(self, '_cache', None) is None:  # Classes with __slots__ start with _cache = None.
         self._cache = dict()
     key = (function.__name__, frozenset(inputs.items()))
     if key not in self._cache:
@@ -23,11 +23,28 @@ def memoize(function, *args, **kwargs):
             self._cache[key] = error
     
     result = self._cache[key]
+    if isinstance(result, deferred):
+        result = self._cache[key] = result.function()
     if isinstance(result, Exception):
         raise result
     else:
         return result
 
+class deferred:  # pylint: disable=invalid-name,too-few-public-methods
+    ''' A value in a memoize cache that is only computed, by calling function, when it is first looked up.
+    
+    This allows an object to be told how to derive one of its memoized values cheaply from another object without
+    paying for this derivation unless the value is actually needed. '''
+    
+    def __init__(self, function):
+        self.function = function
+    
+    @staticmethod
+    def force(value):
+        ''' Return value, computing it first if it is deferred. '''
+        
+        return value.function() if isinstance(value, deferred) else value
+
 def memoizable(cls):
     ''' A class decorator that add the 'set_cache' method to a class. '''
     
@@ -37,7 +54,7 @@ def memoizable(cls):
         inputs = inspect.getcallargs(function, *args, **kwargs)  # pylint: disable=deprecated-method
         self = inputs.pop('self')
         
-        if not hasattr(self, '_cache'):
+        if getattr(self, '_cache', None) is None:
             self._cache = dict()
         key = (function.__name__, frozenset(inputs.items()))
         self._cache[key] = answer
@@ -45,6 +62,25 @@ def memoizable(cls):
     setattr(cls, 'set_cache', set_cache)
     return cls
 
+class lazy:  # pylint: disable=invalid-name,too-few-public-methods
+    ''' A decorator that turns a method into an attribute that is computed the first time that it is accessed.
+    
+    The result is stored in the instance's __dict__ under the same name, which then shadows this (non-data) descriptor.
+    So later accesses are ordinary attribute lookups and the attribute can also be set directly, for example by
+    something that already knows its value. '''
+    
+    def __init__(self, function):
+        self.function = function
+        self.__name__ = function.__name__
+        self.__doc__ = function.__doc__
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        
+        value = instance.__dict__[self.__name__] = self.function(instance)
+        return value
+
 def topological_invariant(function):
     ''' Mark this function as a topological invariant.
     
@@ -12,12 +12,14 @@ NT_TYPE_PERIODIC = 'Periodic'
 NT_TYPE_REDUCIBLE = 'Reducible'  # Strictly this  means 'reducible and not periodic'.
 NT_TYPE_PSEUDO_ANOSOV = 'Pseudo-Anosov'
 
+INVERSE = operator.methodcaller('inverse')  # The involution used to lazily reverse the sequence of an Encoding.
+
 class Encoding:
     ''' This represents a map between two Triangulations.
     
     The map is given by a sequence of Moves which act from right to left. '''
     def __init__(self, sequence):
-        assert isinstance(sequence, (list, tuple))
+        assert isinstance(sequence, (list, tuple, curver.kernel.Rope))
         assert sequence
         # assert all(isinstance(item, curver.kernel.Move) for item in sequence)  # Quadratic.
         
@@ -26,11 +28,12 @@ class Encoding:
         if len(sequence) > 1 and isinstance(sequence[0], curver.kernel.Isometry) and sequence[0].is_identity():
             sequence = sequence[1:]
         
-        self.sequence = sequence
+        self.sequence = sequence if isinstance(sequence, curver.kernel.Rope) else curver.kernel.Rope(sequence)
         
         self.source_triangulation = self.sequence[-1].source_triangulation
         self.target_triangulation = self.sequence[0].target_triangulation
         self.zeta = self.source_triangulation.zeta
+        self._compiled = None  # See compile.
     
     def __repr__(self):
         return str(self)
@@ -38,6 +41,8 @@ class Encoding:
         return 'Encoding %s' % self.sequence
     def __iter__(self):
         return iter(self.sequence)
+    def __reversed__(self):
+        return reversed(self.sequence)
     def __len__(self):
         return len(self.sequence)
     def __getitem__(self, value):
@@ -61,8 +66,11 @@ class Encoding:
             elif stop < start:
                 raise IndexError('list index out of range')
             else:  # start < stop.
-                triangulation = self.sequence[stop-1].source_triangulation
-                return triangulation.encode(self.sequence[value])
+                sequence = self.sequence[value]
+                if isinstance(self, Mapping):  # Then every move of sequence is a FlipGraphMove so we can skip promote.
+                    return (Mapping if sequence[-1].source_triangulation != sequence[0].target_triangulation else MappingClass)(sequence)
+                
+                return Encoding(sequence).promote()
         elif isinstance(value, curver.IntegerType):
             return self.sequence[value]
         else:
@@ -85,44 +93,71 @@ class Encoding:
         # In fact this hash is perfect unless the surface is S_{1,1}.
         return hash(tuple(entry for arc in self.source_triangulation.edge_arcs() for entry in self(arc.boundary())))
     
-    def __call__(self, other):
+    def __call__(self, other, transport=False):
+        ''' Return the image of other under this encoding.
+        
+        If transport is True and other is a Lamination that has already computed its shortening or components then the
+        image is given (lazily evaluated) versions of these derived from those of other rather than recomputing them.
+        This is skipped unless this encoding is a Mapping, since these derived versions need the inverse of this encoding. '''
+        
         if self.source_triangulation != other.triangulation:
             raise ValueError('Cannot apply an Encoding to something on a triangulation other than source_triangulation')
         
         is_lamination = isinstance(other, curver.kernel.Lamination)
         is_homology = isinstance(other, curver.kernel.HomologyClass)
-        if not is_lamination and not is_homology: raise TypeError('Unknown type %s' % other)
+        is_batch = isinstance(other, curver.kernel.LaminationBatch)
+        is_projective = isinstance(other, curver.kernel.ProjectiveLamination)
+        if not is_lamination and not is_homology and not is_batch and not is_projective: raise TypeError('Unknown type %s' % other)
         
-        for item in reversed(self):
-            if is_lamination:
-                other = item.apply_lamination(other)
-            elif is_homology:
-                other = item.apply_homology(other)
+        source = other
+        if self._compiled is not None and (is_lamination or is_batch):
+            other = self._compiled(other)
+        else:
+            for item in reversed(self):
+                if is_lamination:
+                    other = item.apply_lamination(other)
+                elif is_homology:
+                    other = item.apply_homology(other)
+                elif is_batch:
+                    other = item.apply_lamination_batch(other)
+                elif is_projective:
+                    other = item.apply_projective(other)
+        
+        if transport and is_lamination and isinstance(self, Mapping):  # Moves such as Crush are not invertible and so cannot transport.
+            source.transport(self, other)
         
         return other
     def __mul__(self, other):
         if isinstance(other, Encoding):
-            if self.source_triangulation != other.target_triangulation:
-                raise ValueError('Cannot compose Encodings over different triangulations')
-            
-            # We could do
-            #   return Encoding(self.sequence + other.sequence).promote()
-            # but since we know the types of self and other we can avoid rechecking the move types.
-            if not (isinstance(self, Mapping) and isinstance(other, Mapping)):
-                return Encoding(self.sequence + other.sequence)
-            else:  # self and other both at least Mappings:
-                if self.target_triangulation != other.source_triangulation:
-                    return Mapping(self.sequence + other.sequence)
-                else:  # self.target_triangulation == other.source_triangulation:
-                    return MappingClass(self.sequence + other.sequence)
+            return self._product(other, reduce=False)
         elif other is None:
             return self
         else:
             return NotImplemented
+    def _product(self, other, reduce):
+        ''' Return the composition self * other, combining the moves either side of the join if reduce is True, see reduced_product. '''
+        
+        if self.source_triangulation != other.target_triangulation:
+            raise ValueError('Cannot compose Encodings over different triangulations')
+        
+        sequence = reduced_product(self.sequence, other.sequence, reduce)
+        if not sequence:  # Everything cancelled.
+            return other.source_triangulation.id_encoding()
+        
+        # We could do
+        #   return Encoding(sequence).promote()
+        # but since we know the types of self and other we can avoid rechecking the move types.
+        if not (isinstance(self, Mapping) and isinstance(other, Mapping)):
+            return Encoding(sequence)
+        else:  # self and other both at least Mappings:
+            if self.target_triangulation != other.source_triangulation:
+                return Mapping(sequence)
+            else:  # self.target_triangulation == other.source_triangulation:
+                return MappingClass(sequence)
     def inverse(self):
         ''' Return the inverse of this encoding. '''
         
-        return self.__class__([item.inverse() for item in reversed(self.sequence)])  # Data structure issue.
+        return self.__class__(self.sequence.reverse(INVERSE))
     def __invert__(self):
         return self.inverse()
     def promote(self):
@@ -134,6 +169,83 @@ class Encoding:
             return Mapping(self.sequence)
         else:
             return MappingClass(self.sequence)
+    
+    def reduce(self, other=None):
+        ''' Return an Encoding equal to this one in which adjacent moves have been combined wherever possible.
+        
+        This removes identity isometries, cancels flips that are immediately flipped back, composes consecutive isometries
+        and adds together the powers of consecutive twists about the same curve. See Move.combine for the rewrites used.
+        Each of these is an equality of maps and so the result is equal to this encoding but never longer.
+        
+        If other is given then instead return an Encoding equal to self * other in which only the moves either side of the
+        join have been combined. This is much faster than (self * other).reduce() when self and other are already reduced. '''
+        
+        if other is not None:
+            return self._product(other, reduce=True)
+        
+        stack = []  # The reduced moves, in the order in which they are applied.
+        for item in reversed(self):
+            pending = [item]
+            while pending:
+                move = pending.pop()
+                if isinstance(move, curver.kernel.Isometry) and move.is_identity():
+                    continue
+                
+                combined = stack[-1].combine(move) if stack else None
+                if combined is None:
+                    stack.append(move)
+                else:  # Replace stack[-1] and move by the moves of combined and then try to combine these with the new top of the stack.
+                    stack.pop()
+                    pending.extend(combined)
+        
+        if not stack:
+            return self.source_triangulation.id_encoding()
+        
+        return Encoding(stack[::-1]).promote()
+    
+    def layer(self):
+        ''' Return an Encoding equal to this one in which each run of consecutive EdgeFlips has been regrouped into MultiEdgeFlips.
+        
+        Each run is replaced by the fewest possible layers of flips with disjoint support, see layered_flips.
+        Other moves, such as Isometries, are left where they are and separate the runs. '''
+        
+        sequence = []  # The new moves, in the order in which they are applied.
+        run = []
+        for item in reversed(self):
+            if isinstance(item, curver.kernel.EdgeFlip):
+                run.append(item)
+            else:
+                sequence.extend(layered_flips(run))
+                sequence.append(item)
+                run = []
+        sequence.extend(layered_flips(run))
+        
+        return Encoding(sequence[::-1]).promote()
+    
+    def compile(self):
+        ''' Return a CompiledEncoding that applies this encoding to laminations much more quickly.
+        
+        Once this has been called, applying this encoding to a Lamination or LaminationBatch runs the compiled program.
+        This is worthwhile when the same encoding is applied to many laminations. '''
+        
+        if self._compiled is None:
+            self._compiled = curver.kernel.CompiledEncoding(self)
+        
+        return self._compiled
+    
+    def compact(self, window=None):
+        ''' Return a CompactEncoding equal to this encoding.
+        
+        This only keeps a few of the intermediate triangulations and so uses much less memory when this encoding is long,
+        for example, when it is a high power of a mapping class. Note that powers and products of CompactEncodings are compact too.
+        
+        Roughly one triangulation is kept for every window moves, which defaults to curver.kernel.compact.WINDOW. '''
+        
+        if window is None: window = curver.kernel.compact.WINDOW
+        
+        boundaries = dict((position, item.target_triangulation) for position, item in enumerate(self) if position % window == 0)
+        boundaries[len(self)] = self.source_triangulation
+        return curver.kernel.CompactEncoding.from_moves(self, boundaries, window)
 
 class Mapping(Encoding):
     ''' An Encoding where every move is a FlipGraphMove.
@@ -221,12 +333,12 @@ class MappingClass(Mapping):
     ''' A Mapping from a Triangulation to itself.
     
     That is, one where self.source_triangulation == self.target_triangulation. '''
-    def __call__(self, other, power=1):
+    def __call__(self, other, power=1, transport=False):
         if power < 0:
-            return self.inverse()(other, power=-power)
+            return self.inverse()(other, power=-power, transport=transport)
         
         for _ in range(power):
-            other = super().__call__(other)
+            other = super().__call__(other, transport=transport)
         return other
     def __str__(self):
         return 'MappingClass %s' % self.sequence
@@ -435,6 +547,72 @@ class MappingClass(Mapping):
         except ValueError:
             return False
 
+def reduced_product(left, right, reduce=True):
+    ''' Return the Rope of moves left + right in which the moves on either side of the join have been combined wherever possible.
+    
+    This performs the same rewrites as Encoding.reduce but only examines the moves next to the join, so it
+    takes O(k log(n)) time when k moves are combined. The result may be empty if every move cancels.
+    
+    If reduce is False then no moves are combined and this is just left + right. '''
+    
+    if not reduce:
+        return left + right
+    
+    pending = []  # Moves taken from the end of left, the last of which is applied first.
+    while pending or left:
+        if not pending:
+            pending.append(left[-1])
+            left = left[:-1]
+        
+        move = pending.pop()
+        while right and isinstance(right[0], curver.kernel.Isometry) and right[0].is_identity():
+            right = right[1:]
+        if isinstance(move, curver.kernel.Isometry) and move.is_identity():
+            continue
+        
+        combined = right[0].combine(move) if right else None
+        if combined is None:
+            right = curver.kernel.Rope(pending + [move]) + right
+            break
+        
+        right = right[1:]
+        pending.extend(combined)
+    
+    return left + right
+
+def layered_flips(flips):
+    ''' Return a list of EdgeFlips and MultiEdgeFlips, in the order in which they are applied, that is equal to the given list of
+    consecutive EdgeFlips, also in the order in which they are applied, but that has as few moves as possible.
+    
+    A flip only depends on the earlier flips that created one of the two triangles that it flips and it commutes with all of
+    the others. So we schedule each flip in the layer after the latest one that it depends on. This gives the fewest layers
+    since each flip ends up at the depth of the longest chain of dependencies ending with it. Within a layer each triangle is
+    flipped at most once and so the flips in it have disjoint support. '''
+    
+    if not flips:
+        return []
+    
+    created = dict()  # Mapping triangle --> the index of the layer that created it.
+    layers = []
+    for flip in flips:
+        source, target = flip.source_triangulation, flip.target_triangulation
+        depth = max(created.get(source.triangle_lookup[edge], -1) for edge in [flip.edge, ~flip.edge]) + 1
+        if depth == len(layers):
+            layers.append([])
+        layers[depth].append(flip.edge)
+        for edge in [flip.edge, ~flip.edge]:
+            created[target.triangle_lookup[edge]] = depth
+    
+    moves = []
+    T = flips[0].source_triangulation
+    for edges in layers:
+        move = (T.encode_flip(edges[0]) if len(edges) == 1 else T.encode_multiflip(edges))[0]
+        moves.append(move)
+        T = move.target_triangulation
+    assert T == flips[-1].target_triangulation
+    
+    return moves
+
 def create_encoding(source_triangulation, sequence):
     ''' Return the encoding defined by sequence starting at source_triangulation.
     
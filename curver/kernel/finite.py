@@ -209,15 +209,16 @@ class FiniteSubgroup:
         component_lookup = dict((oriented[edge], component) for component in components for edge in component if edge in oriented)
         
         # C) The size of the orbit of each component of triangulation under the action of h.
-        classes = curver.kernel.UnionFind(components)
+        component_index = dict((component, index) for index, component in enumerate(components))
+        classes = curver.kernel.IntegerUnionFind(len(components))
         for a in oriented_arcs:
             for b in oriented_arcs:
                 if pairs[a][b]:
-                    classes.union(component_lookup[a], component_lookup[b])
+                    classes.union(component_index[component_lookup[a]], component_index[component_lookup[b]])
         component_orbit_size = dict()
         for cls in classes:
-            for component in cls:
-                component_orbit_size[component] = len(components)
+            for index in cls:
+                component_orbit_size[components[index]] = len(components)
         
         # D) The (orbifold) Euler characteristic of each components quotient.
         euler_characteristic = dict((component, Fraction(surface[component].chi * component_orbit_size[component], order)) for component in components)
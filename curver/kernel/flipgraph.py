@@ -0,0 +1,173 @@
+''' A module for representing the flip graph of a surface modulo its mapping class group. '''
+
+import os
+
+import networkx
+
+import curver
+
+class ModularFlipGraph:
+    ''' This represents the flip graph of a surface modulo its mapping class group.
+    
+    Its vertices are the combinatorial types of triangulation of the surface, which are identified by
+    their isomorphism signatures. The canonical representative of a vertex is the triangulation that
+    Triangulation.from_sig builds from its signature. For each flippable edge of the representative of a
+    vertex there is an edge of this graph. This records the label of the edge that is flipped, the vertex
+    that this leads to and the image of label 0 under the isometry from the flipped triangulation to the
+    representative of that vertex. This last piece of information determines the isometry since the
+    surface is connected.
+    
+    The vertices are numbered in the order that they are found by a breadth first search from the starting
+    triangulation and are expanded in this order. If a path is given then the graph is stored there and is
+    loaded from there if it already exists. Since the file is only ever appended to, an enumeration that is
+    interrupted can be resumed by building a new ModularFlipGraph from the same path.
+    
+    The file consists of two kinds of lines:
+     - 'v sig' which records that the vertex with signature sig has been found, and
+     - 'x id label,target,image ...' which records the edges coming out of the vertex with the given id. '''
+    def __init__(self, triangulation, path=None):
+        assert isinstance(triangulation, curver.kernel.Triangulation)
+        assert triangulation.is_connected()
+        
+        self.zeta = triangulation.zeta
+        self.num_vertices = triangulation.num_vertices  # Of the triangulations, not of this graph.
+        self.path = path
+        self.sigs = []  # Maps vertex id to signature.
+        self.ids = dict()  # Maps signature to vertex id.
+        self.edges = []  # Maps vertex id to its list of edges (label, target id, image of label 0) if it has been expanded.
+        
+        if self.path is not None and os.path.exists(self.path):
+            complete = 0  # The number of bytes in the complete lines of the file.
+            with open(self.path, 'rb') as disk:
+                for line in disk:
+                    if not line.endswith(b'\n'):  # A partially written line from an interrupted enumeration.
+                        break
+                    complete += len(line)
+                    fields = line.decode().split()
+                    kind, data = fields[0], fields[1:]
+                    if kind == 'v':
+                        self._add_vertex(data[0])
+                    elif kind == 'x':
+                        assert int(data[0]) == len(self.edges)
+                        self.edges.append([tuple(int(x) for x in edge.split(',')) for edge in data[1:]])
+                    else:
+                        raise ValueError('Unknown record %r in %s' % (kind, self.path))
+            
+            if complete < os.path.getsize(self.path):  # Remove the partial line so that we do not append to it.
+                with open(self.path, 'r+b') as disk:
+                    disk.truncate(complete)
+            
+            if self.sigs:
+                representative = self.representative(self.sigs[0])
+                if representative.zeta != self.zeta or representative.num_vertices != self.num_vertices:
+                    raise ValueError('%s contains the flip graph of a different surface' % self.path)
+        
+        sig = triangulation.iso_sig()
+        if sig not in self.ids:
+            self._add_vertex(sig)
+            self._write('v %s\n' % sig)
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return 'ModularFlipGraph with %d vertices, %d of which are expanded' % (len(self), len(self.edges))
+    def __len__(self):
+        return len(self.sigs)
+    def __iter__(self):
+        return iter(self.sigs)
+    def __contains__(self, sig):
+        return sig in self.ids
+    
+    def _add_vertex(self, sig):
+        ''' Give the vertex with signature sig the next id. '''
+        
+        self.ids[sig] = len(self.sigs)
+        self.sigs.append(sig)
+    
+    def _write(self, text):
+        ''' Append text to the file storing this graph, if there is one. '''
+        
+        if self.path is not None:
+            with open(self.path, 'a') as disk:
+                disk.write(text)
+    
+    def representative(self, sig):
+        ''' Return the canonical representative of the vertex with signature sig. '''
+        
+        return curver.kernel.Triangulation.from_sig(sig)
+    
+    def canonical(self, triangulation):
+        ''' Return the signature of the vertex containing triangulation and an isometry from triangulation to its representative. '''
+        
+        sig = triangulation.iso_sig()
+        return sig, triangulation.first_isometry_to(self.representative(sig))
+    
+    def is_complete(self):
+        ''' Return whether every vertex has been expanded and so this is the entire flip graph. '''
+        
+        return len(self.edges) == len(self.sigs)
+    
+    def expand(self):
+        ''' Expand the next vertex and return its signature.
+        
+        This finds all of the edges coming out of it, adding any new vertices that they lead to. '''
+        
+        assert not self.is_complete()
+        
+        vertex_id = len(self.edges)
+        representative = self.representative(self.sigs[vertex_id])
+        edges = []
+        lines = []
+        for edge in representative.positive_edges:
+            if representative.is_flippable(edge):
+                flipped = representative.encode_flip(edge).target_triangulation
+                sig, isometry = self.canonical(flipped)
+                if sig not in self.ids:
+                    self._add_vertex(sig)
+                    lines.append('v %s\n' % sig)
+                edges.append((edge.label, self.ids[sig], isometry.label_map[0]))
+        
+        self.edges.append(edges)
+        lines.append(' '.join(['x', str(vertex_id)] + ['%d,%d,%d' % edge for edge in edges]) + '\n')
+        self._write(''.join(lines))  # A single write so the file is always consistent.
+        
+        return self.sigs[vertex_id]
+    
+    def build(self, max_vertices=None):
+        ''' Expand vertices until the entire flip graph is found or max_vertices have been expanded in total.
+        
+        Return whether the entire flip graph has been found. '''
+        
+        while not self.is_complete() and (max_vertices is None or len(self.edges) < max_vertices):
+            self.expand()
+        
+        return self.is_complete()
+    
+    def neighbours(self, sig):
+        ''' Return the list of pairs (label, target) such that flipping label in the representative of sig leads to the vertex with signature target.
+        
+        The vertex must already have been expanded. '''
+        
+        return [(label, self.sigs[target_id]) for label, target_id, _ in self.edges[self.ids[sig]]]
+    
+    def encode_flip(self, sig, label):
+        ''' Return the encoding from the representative of sig to the representative of its neighbour across label.
+        
+        This is the flip of label followed by the isometry to the representative of the neighbour. '''
+        
+        [(target_id, image)] = [(target_id, image) for edge_label, target_id, image in self.edges[self.ids[sig]] if edge_label == label]
+        flip = self.representative(sig).encode_flip(label)
+        return flip.target_triangulation.find_isometry(self.representative(self.sigs[target_id]), {0: image}).encode() * flip
+    
+    def graph(self):
+        ''' Return the expanded part of this graph as a networkx.MultiDiGraph on signatures.
+        
+        Each edge of the flip graph appears once in each direction and is labelled by the label that is flipped to traverse it. '''
+        
+        G = networkx.MultiDiGraph()
+        G.add_nodes_from(self.sigs)
+        for vertex_id, edges in enumerate(self.edges):
+            for label, target_id, _ in edges:
+                G.add_edge(self.sigs[vertex_id], self.sigs[target_id], label=label)
+        
+        return G
@@ -2,11 +2,14 @@
 ''' A module for representing laminations on Triangulations. '''
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from itertools import permutations, groupby, product, chain
 from queue import Queue
 
+import numpy as np
+
 import curver
-from curver.kernel.decorators import memoize, topological_invariant, ensure  # Special import needed for decorating.
+from curver.kernel.decorators import memoize, topological_invariant, ensure, deferred  # Special import needed for decorating.
 
 def render_topological_type(self):
     ''' Return the canonical string of a topological type (from arXiv:1910.08155). '''
@@ -24,35 +27,53 @@ class Lamination:
     ''' This represents a lamination on a triangulation.
     
     Users should create these via Triangulation(...) or Triangulation.lamination(...). '''
+    
+    # Warning: This needs to be updated if the internals of this class ever change.
+    __slots__ = ['triangulation', 'zeta', 'geometric', '_dual', '_left', '_right', '_cache']
+    
     def __init__(self, triangulation, geometric):
         assert isinstance(triangulation, curver.kernel.Triangulation)
         
         self.triangulation = triangulation
         self.zeta = self.triangulation.zeta
-        self.geometric = geometric
-        
-        # Store some additional weights that are often used.
-        self._dual = dict()
-        self._left = dict()
-        self._right = dict()
-        for triangle in self.triangulation:
-            i, j, k = triangle  # Edges.
-            a, b, c = self.geometric[i.index], self.geometric[j.index], self.geometric[k.index]
+        self.geometric = tuple(geometric)  # Laminations are immutable so that they can compute things lazily.
+        
+        # We also use some additional weights, see dual_weight, left_weight and right_weight.
+        # Since many laminations are built only to be moved on to the next triangulation,
+        # these are not computed until they are first needed. See _build_side_weights.
+        self._dual = self._left = self._right = None
+        self._cache = None  # See memoize.
+    
+    def _build_side_weights(self):
+        ''' Compute the dual, left and right weights of this lamination.
+        
+        These are stored in flat lists indexed by label + zeta. '''
+        
+        zeta = self.zeta
+        geometric = self.geometric
+        half = curver.kernel.utilities.half
+        dual, left, right = [None] * (2 * zeta), [None] * (2 * zeta), [None] * (2 * zeta)
+        for triangle in self.triangulation._triangles:  # The order does not matter so avoid sorting the triangles.  # pylint: disable=protected-access
+            i, j, k = triangle.labels
+            a, b, c = geometric[i if i >= 0 else ~i], geometric[j if j >= 0 else ~j], geometric[k if k >= 0 else ~k]
             af, bf, cf = max(a, 0), max(b, 0), max(c, 0)  # Correct for negatives.
             correction = min(af + bf - cf, bf + cf - af, cf + af - bf, 0)
-            self._dual[i] = self._right[j] = self._left[k] = curver.kernel.utilities.half(bf + cf - af + correction)
-            self._dual[j] = self._right[k] = self._left[i] = curver.kernel.utilities.half(cf + af - bf + correction)
-            self._dual[k] = self._right[i] = self._left[j] = curver.kernel.utilities.half(af + bf - cf + correction)
+            i, j, k = i + zeta, j + zeta, k + zeta
+            dual[i] = right[j] = left[k] = half(bf + cf - af + correction)
+            dual[j] = right[k] = left[i] = half(cf + af - bf + correction)
+            dual[k] = right[i] = left[j] = half(af + bf - cf + correction)
+        
+        self._dual, self._left, self._right = dual, left, right
     
     def __repr__(self):
-        return '%s(%r, %r)' % (self.__class__.__name__, self.triangulation, self.geometric)
+        return '%s(%r, %r)' % (self.__class__.__name__, self.triangulation, list(self.geometric))
     def __str__(self):
         return '%s %s on %s' % (self.__class__.__name__, '[' + ', '.join(str(weight) for weight in self.geometric) + ']', self.triangulation)
     def __iter__(self):
         return iter(self.geometric)
     def __call__(self, edge):
         ''' Return the geometric measure assigned to item. '''
-        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        if isinstance(edge, curver.IntegerType): return self.geometric[edge if edge >= 0 else ~edge]  # If given an integer instead.
         
         return self.geometric[edge.index]
     def __bool__(self):
@@ -111,27 +132,33 @@ class Lamination:
         
         Note that when there is a terminal normal arc then we record this weight with a negative sign. '''
         
-        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        label = edge if isinstance(edge, curver.IntegerType) else edge.label  # If given an Edge instead.
+        
+        if self._dual is None: self._build_side_weights()
         
-        return self._dual[edge]
+        return self._dual[label + self.zeta]
     
     def left_weight(self, edge):
         ''' Return the number of component of this lamination dual to the left of the given edge.
         
         Note that when there is a terminal normal arc then we record this weight with a negative sign. '''
         
-        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        label = edge if isinstance(edge, curver.IntegerType) else edge.label  # If given an Edge instead.
+        
+        if self._left is None: self._build_side_weights()
         
-        return self._left[edge]
+        return self._left[label + self.zeta]
     
     def right_weight(self, edge):
         ''' Return the number of component of this lamination dual to the right the given edge.
         
         Note that when there is a terminal normal arc then we record this weight with a negative sign. '''
         
-        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        label = edge if isinstance(edge, curver.IntegerType) else edge.label  # If given an Edge instead.
         
-        return self._right[edge]
+        if self._right is None: self._build_side_weights()
+        
+        return self._right[label + self.zeta]
     
     def is_integral(self):
         ''' Return whether this lamination is integral. '''
@@ -139,22 +166,62 @@ class Lamination:
         return all(weight == int(weight) for weight in self) and all(self.dual_weight(edge) == int(self.dual_weight(edge)) for edge in self.triangulation.edges)
     
     def promote(self):
-        ''' Return this lamination in its finest form. '''
+        ''' Return this lamination in its finest form.
+        
+        Since determining the finest class of an integral lamination requires shortening it, this returns an
+        UnresolvedLamination which only does so when its class is actually needed. '''
         
         if not self.is_integral():
             return self
         
+        return UnresolvedLamination(self.triangulation, self.geometric)
+    
+    def kind(self):
+        ''' Return the finest class that this lamination belongs to.
+        
+        This is one of Lamination, IntegralLamination, MultiCurve, Curve, MultiArc or Arc. '''
+        
+        if not self.is_integral():
+            return Lamination
+        
+        # Shorten a plain IntegralLamination, since the methods of self might depend on its kind, but share the cache.
+        if self._cache is None: self._cache = dict()
         temp = IntegralLamination(self.triangulation, self.geometric)
+        temp._cache = self._cache  # pylint: disable=attribute-defined-outside-init
         short, _ = temp.shorten()  # Shorten returns a short lamination of the correct class.
-        promoted = short.__class__(self.triangulation, self.geometric)
         
-        # Move cache across.
-        try:
-            promoted._cache = temp._cache  # pylint: disable=attribute-defined-outside-init
-        except AttributeError:
-            pass  # No cache.
+        return short.__class__
+    
+    def transport(self, encoding, image):
+        ''' Give image, which must be encoding(self) for some Mapping encoding, the shortening and components of this lamination if these have already been computed.
+        
+        If s = h(self) then s = (h * encoding^{-1})(image) and the components of image are the images of the components of self.
+        These are stored in the cache of image as deferred values and so are only built if they are actually needed.
+        The components are themselves mapped with transport so that they can reuse their own shortenings too. '''
         
-        return promoted
+        assert isinstance(encoding, curver.kernel.Mapping)  # Otherwise encoding might not be invertible.
+        assert encoding.source_triangulation == self.triangulation
+        assert image.triangulation == encoding.target_triangulation
+        
+        if self._cache is None: return
+        if image._cache is None: image._cache = dict()  # pylint: disable=protected-access
+        
+        for key, value in self._cache.items():
+            if key in image._cache or isinstance(value, Exception):  # pylint: disable=protected-access
+                continue
+            
+            name, _ = key
+            if name == 'shorten':
+                def derive_shorten(value=value):  # Bind value now.
+                    ''' Return the shortening of image derived from that of self. '''
+                    short, conjugator = deferred.force(value)
+                    return short, conjugator * encoding.inverse()
+                image._cache[key] = deferred(derive_shorten)  # pylint: disable=protected-access
+            elif name == 'components':
+                def derive_components(value=value):  # Bind value now.
+                    ''' Return the components of image derived from those of self. '''
+                    return dict((encoding(component, transport=True), multiplicity) for component, multiplicity in deferred.force(value).items())
+                image._cache[key] = deferred(derive_components)  # pylint: disable=protected-access
     
     @topological_invariant
     def is_empty(self):
@@ -281,9 +348,30 @@ class Lamination:
         
         return components
 
-class IntegralLamination(Lamination):
+class LaminationType(type):
+    ''' The metaclass of IntegralLamination and its subclasses.
+    
+    This makes an UnresolvedLamination resolve its class when asked whether it is an instance of a finer class. '''
+    def __instancecheck__(cls, instance):
+        if type(instance) is UnresolvedLamination and not issubclass(UnresolvedLamination, cls):
+            instance.kind()
+        
+        return super().__instancecheck__(instance)
+
+class IntegralLamination(Lamination, metaclass=LaminationType):
     ''' This represents a lamination in which all weights are integral. '''
     
+    __slots__ = []
+    
+    def __init_subclass__(cls, resolved=True, **kwargs):
+        super().__init_subclass__(**kwargs)
+        
+        # An UnresolvedLamination must resolve its class before running any of the methods that a subclass defines.
+        if resolved:
+            for name, value in vars(cls).items():
+                if callable(value) and name not in vars(UnresolvedLamination):
+                    setattr(UnresolvedLamination, name, UnresolvedLamination.resolving(name))
+    
     def skeleton(self):
         ''' Return the lamination obtained by collapsing parallel components. '''
         
@@ -299,35 +387,47 @@ class IntegralLamination(Lamination):
         
         If multiple laminations are given then ``sum(i(self, lamination) for laminations)`` is returned. '''
         
+        return sum(self.intersections(laminations))
+    
+    def intersections(self, laminations):
+        ''' Return the list of geometric intersection numbers between this lamination and each of the given laminations.
+        
+        This only shortens this lamination once and maps all of the laminations through the conjugator together
+        and so is much faster than computing each intersection number separately. '''
+        
+        laminations = list(laminations)
         assert all(isinstance(lamination, Lamination) for lamination in laminations)
         assert all(lamination.triangulation == self.triangulation for lamination in laminations)
         
         short, conjugator = self.shorten()
-        short_laminations = [conjugator(lamination) for lamination in laminations]
+        if len(laminations) >= 16:  # Mapping a batch has a higher overhead per move, so only do so when there are enough laminations.
+            short_laminations = conjugator(curver.kernel.LaminationBatch.from_laminations(self.triangulation, laminations)).laminations(promote=False)
+        else:
+            short_laminations = [conjugator(lamination) for lamination in laminations]
         
-        intersection = 0
+        intersections = [0] * len(laminations)
         
         # Peripheral components.
         for _, (multiplicity, vertex) in short.peripheral_components().items():
-            for lamination in laminations:
-                intersection += multiplicity * sum(max(-lamination(edge), 0) + max(-lamination.left_weight(edge), 0) for edge in vertex)
+            for index, lamination in enumerate(laminations):
+                intersections[index] += multiplicity * sum(max(-lamination(edge), 0) + max(-lamination.left_weight(edge), 0) for edge in vertex)
         
         # Parallel components.
         for component, (multiplicity, p) in short.parallel_components().items():
             if isinstance(component, curver.kernel.Arc):
-                for short_lamination in short_laminations:
-                    intersection += multiplicity * max(short_lamination(p), 0)
+                for index, short_lamination in enumerate(short_laminations):
+                    intersections[index] += multiplicity * max(short_lamination(p), 0)
             else:  # isinstance(component, curver.kernel.Curve):
                 v = short.triangulation.vertex_lookup[p]  # = self.triangulation.vertex_lookup[~p].
                 v_edges = curver.kernel.utilities.cyclic_slice(v, p, ~p)  # The set of edges that come out of v from p round to ~p.
                 
-                for short_lamination in short_laminations:
+                for index, short_lamination in enumerate(short_laminations):
                     around_v = curver.kernel.utilities.minimal((short_lamination.left_weight(edgy) for edgy in v_edges), lower_bound=0)
                     out_v = sum(max(-short_lamination.left_weight(edge), 0) for edge in v_edges) + sum(max(-short_lamination(edge), 0) for edge in v_edges[1:])
                     # around_v > 0 ==> out_v == 0; out_v > 0 ==> around_v == 0.
-                    intersection += multiplicity * (max(short_lamination(p), 0) - 2 * around_v + out_v)
+                    intersections[index] += multiplicity * (max(short_lamination(p), 0) - 2 * around_v + out_v)
         
-        return intersection
+        return intersections
     
     def no_common_component(self, lamination):
         ''' Return that self does not share any components with the given IntegralLamination. '''
@@ -529,71 +629,82 @@ class IntegralLamination(Lamination):
             for e1, e2 in zip(edges, edges[1:] + edges[:1]):
                 ordering[e1] = ~e2
         # Build the image -> vertex map.
-        classes = curver.kernel.UnionFind(triangulation.edges)
-        for edge in triangulation.edges:
-            if not image(edge):
-                classes.union(edge, ~edge)
-        for triangle in triangulation:
-            classes.union(*triangle)
-        classes_lookup = dict((edge, cls) for cls in classes for edge in cls)
+        zeta = triangulation.zeta
+        classes = curver.kernel.IntegerUnionFind(2 * zeta)  # Work with label + zeta.
+        unimaged = [edge.label + zeta for edge in triangulation.edges if not image(edge)]
+        classes.union_pairs(unimaged, [2 * zeta - 1 - item for item in unimaged])  # Since ~label + zeta == 2 * zeta - 1 - (label + zeta).
+        classes.union_pairs(range(2 * zeta), [label + zeta for label in triangulation._next])  # pylint: disable=protected-access
+        classes_lookup = dict((edge, cls) for cls in ([triangulation.edges[item] for item in items] for items in classes) for edge in cls)
         disjoint_vertices = [vertex for vertex in triangulation.vertices if all(not image(e) for e in vertex)]
         image_vertex_map = dict((edge, vertex) for vertex in disjoint_vertices for edge in classes_lookup[vertex[0]])
         
-        best_node_labels = [node_labels[node] for node in nodes]  # We know the best node labels right away.
-        best_link_labels = None
-        best_node_markings = None
-        for X in product(*(permutations(g) for k, g in groupby(range(len(nodes)), key=lambda i: node_labels[nodes[i]]))):  # pylint: disable=too-many-nested-blocks
-            perm = list(chain(*X))
-            
-            inverse_perm = [None] * len(perm)
-            for index, i in enumerate(perm):
-                inverse_perm[i] = index
-            permuted_link_labels = [link_labels[i][j] for index, i in enumerate(inverse_perm) for j in inverse_perm[index:]]
-            
-            if best_link_labels is not None and permuted_link_labels >= best_link_labels:
-                continue
-            best_link_labels = list(permuted_link_labels)
-            
-            permuted_nodes = [nodes[i] for i in perm]
-            permuted_node_lookup = dict((node, index) for index, node in enumerate(permuted_nodes))
-            
-            # Build marking.
-            node_markings = []
-            for node in permuted_nodes:
-                starting_edges = [edge for edge in node if image(edge)]
-                if starting_edges:  # Skip nodes that do not have any markings.
-                    best_node_marking = None
-                    for starting_edge in starting_edges:
-                        node_marking = []
-                        edge_marking = {starting_edge: 0, ~starting_edge: 0}
-                        to_do = Queue()
-                        to_do.put(starting_edge)
-                        to_do.put(~starting_edge)
-                        done = set()
-                        while not to_do.empty():
-                            current = to_do.get()
-                            while current not in done:  # Wall around this polygon.
-                                if current not in edge_marking:
-                                    edge_marking[current] = edge_marking[~current] = len(edge_marking) // 2
-                                    to_do.put(~current)
-                                node_marking.append((edge_marking[current], image(current)))
-                                done.add(current)
-                                current = ordering[current]
-                            
-                            # Mark the break between one cycle and the next.
-                            node_marking.append((-1, permuted_node_lookup[vertex_paired_node_map[image_vertex_map[current]]] if current in image_vertex_map else -1))
-                        
-                        if best_node_marking is not None and node_marking >= best_node_marking:
-                            continue
-                        best_node_marking = node_marking
+        # Build the marking templates. For each node and each possible starting edge this records the walk around the
+        # node, except that the node paired with a vertex is recorded by its index in nodes since the label it gets
+        # depends on the ordering of the nodes. So the markings of an ordering are obtained by substituting positions.
+        node_index = dict((node, index) for index, node in enumerate(nodes))
+        templates = []
+        for node in nodes:
+            starting_edges = [edge for edge in node if image(edge)]
+            node_templates = []
+            for starting_edge in starting_edges:
+                node_template = []
+                edge_marking = {starting_edge: 0, ~starting_edge: 0}
+                to_do = Queue()
+                to_do.put(starting_edge)
+                to_do.put(~starting_edge)
+                done = set()
+                while not to_do.empty():
+                    current = to_do.get()
+                    while current not in done:  # Wall around this polygon.
+                        if current not in edge_marking:
+                            edge_marking[current] = edge_marking[~current] = len(edge_marking) // 2
+                            to_do.put(~current)
+                        node_template.append((edge_marking[current], image(current)))
+                        done.add(current)
+                        current = ordering[current]
                     
-                    node_markings.append(best_node_marking)
-                else:
-                    node_markings.append([])
+                    # Mark the break between one cycle and the next.
+                    node_template.append((-1, node_index[vertex_paired_node_map[image_vertex_map[current]]] if current in image_vertex_map else -1))
+                node_templates.append(node_template)
+            templates.append(node_templates)
+        
+        def substitute(template, lookup):
+            ''' Return the given template with each node index i replaced by lookup[i]. '''
             
-            if best_node_markings is not None and node_markings >= best_node_markings:
-                continue
-            best_node_markings = node_markings
+            return [(-1, lookup[index] if index >= 0 else -1) if marking == -1 else (marking, index) for marking, index in template]
+        
+        def node_markings(perm):
+            ''' Return the markings of the nodes when they are ordered by perm. '''
+            
+            position = [None] * len(perm)
+            for index, i in enumerate(perm):
+                position[i] = index
+            return [min(substitute(template, position) for template in templates[i]) if templates[i] else [] for i in perm]
+        
+        cells = [list(g) for _, g in groupby(range(len(nodes)), key=lambda i: node_labels[nodes[i]])]
+        best_node_labels = [node_labels[node] for node in nodes]  # We know the best node labels right away.
+        if not any(templates):  # Every marking is empty, for example when this is a multicurve, so only the link labels matter.
+            best_link_labels, best_node_markings = curver.kernel.utilities.canonical_form(cells, link_labels, node_markings, lambda automorphism: True)
+        else:
+            # The markings are those of the orderings that improve on the link labels of every ordering before them, in the
+            # order that they are listed below. So to keep the same values we must still go through the orderings in this order.
+            best_link_labels = None
+            best_node_markings = None
+            for X in product(*(permutations(cell) for cell in cells)):
+                perm = list(chain(*X))
+                
+                inverse_perm = [None] * len(perm)
+                for index, i in enumerate(perm):
+                    inverse_perm[i] = index
+                permuted_link_labels = [link_labels[i][j] for index, i in enumerate(inverse_perm) for j in inverse_perm[index:]]
+                
+                if best_link_labels is not None and permuted_link_labels >= best_link_labels:
+                    continue
+                best_link_labels = permuted_link_labels
+                
+                permuted_node_markings = node_markings(perm)
+                if best_node_markings is None or permuted_node_markings < best_node_markings:
+                    best_node_markings = permuted_node_markings
         
         return TopologicalType(best_node_labels, best_link_labels, best_node_markings)
     
@@ -649,14 +760,12 @@ class IntegralLamination(Lamination):
         lamination = self.non_peripheral(promote=False)
         conjugator = self.triangulation.id_encoding()
         
-        def shorten_strategy(self, edge):
-            ''' Return a float in [0, 1] describing how good flipping this edge is for making this lamination short. '''
-            
-            if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        def shorten_strategy(workspace, label):
+            ''' Return a float in [0, 1] describing how good flipping this label is for making the lamination in this workspace short. '''
             
-            if not self.triangulation.is_flippable(edge): return 0
+            if not workspace.triangulation.is_flippable(label): return 0
             
-            ad, bd, cd, dd, ed = [self.dual_weight(edgy) for edgy in self.triangulation.square(edge)]
+            ad, bd, cd, dd, ed = [workspace.dual_weight(edgy.label) for edgy in workspace.triangulation.square(label)]
             
             if ed < 0:  # Non-parallel arc.
                 return 1
@@ -667,7 +776,6 @@ class IntegralLamination(Lamination):
             return 0
         
         arc_components, curve_components = dict(), dict()
-        has_arcs = True
         while True:
             # Subtract.
             geometric = list(lamination)
@@ -683,38 +791,52 @@ class IntegralLamination(Lamination):
             
             if not lamination: break
             
-            # The arcs will be dealt with in the first round and once they are gone, they are gone.
-            has_arcs = has_arcs and any(lamination(edge) < 0 or lamination.dual_weight(edge) < 0 for edge in lamination.triangulation.edges)
+            # We move lamination and peripheral through the flips in place and only rebuild them at the end of the round.
+            workspace, peripheral_workspace = LaminationWorkspace(lamination), LaminationWorkspace(peripheral)
+            moves = []  # The moves applied this round, in order.
+            
+            # We flip the first edge of extra + triangulation.edges with the largest value of shorten_strategy.
+            # Since a flip only changes the value of shorten_strategy on the edges of its square, we keep
+            # the values in a BucketQueue and only update these after each flip.
+            strategy = curver.kernel.BucketQueue(dict((label, shorten_strategy(workspace, label)) for label in lamination.triangulation.labels))
             extra = []  # High priority edges to check.
             while True:
-                # Note that if lamination does not have any arcs then the max value that shorten_strategy can return is 0.5.
-                # Also triangulation.edges are listed in increasing order so this process is deterministic.
-                edge = curver.kernel.utilities.maximum(
-                    extra + lamination.triangulation.edges,
-                    key=lambda edge: shorten_strategy(lamination, edge),
-                    upper_bound=1 if has_arcs else 0.5)
-                if shorten_strategy(lamination, edge) == 0: break  # No non-parallel arcs or bipods.
+                best = strategy.peek()  # The smallest label with the largest value, which is how triangulation.edges is ordered.
+                if best is None: break  # No non-parallel arcs or bipods.
+                edge = next((edgy for edgy in extra if strategy[edgy.label] == strategy[best]), workspace.triangulation.edges[best + self.zeta])
                 
-                a, b, c, d, e = lamination.triangulation.square(edge)
-                move = lamination.triangulation.encode_flip(edge)  # edge is always flippable.
+                a, b, c, d, e = workspace.triangulation.square(edge)
+                move = workspace.triangulation.encode_flip(edge)  # edge is always flippable.
+                changed = [a, b, c, d, e]  # The edges whose squares have changed.
                 # Since looking for and applying a twist is expensive, we will not do it if:
                 #  * drop == 0,
                 #  * lamination has little weight, or
                 #  * flipping drops the weight by at least drop%.
-                if drop > 0 and 4 * self.zeta < lamination.weight() and (1 - drop) * lamination.weight() < move(lamination).weight() < lamination.weight():
+                if drop > 0 and 4 * self.zeta < workspace.weight and (1 - drop) * workspace.weight < workspace.weight_after_flip(edge.label) < workspace.weight:
+                    lamination = workspace.lamination()
                     try:
                         curve = lamination.trace_curve(edge, lamination.left_weight(edge), 2*self.zeta)
                         slope = curve.slope(lamination)  # Will raise a ValueError if these are disjoint.
                         if abs(slope) > 2:  # Can accelerate and slope is large enough to be efficient.
                             move = curve.encode_twist(power=-int(slope))  # Round towards zero.
+                            changed = lamination.triangulation.positive_edges
                     except ValueError:
                         extra = [c, d]
                 else:
                     extra = [c, d]
                 
-                conjugator = move * conjugator
-                lamination = move(lamination)
-                peripheral = move(peripheral)
+                moves.append(move)
+                workspace.apply(move)
+                peripheral_workspace.apply(move)
+                for edgy in changed:
+                    strategy[edgy.index] = shorten_strategy(workspace, edgy.index)
+                    strategy[~edgy.index] = shorten_strategy(workspace, ~edgy.index)
+            
+            if moves:
+                # Composing all of the moves at once avoids copying the sequence of conjugator after every move.
+                conjugator = curver.kernel.Encoding([item for move in reversed(moves) for item in move]).promote() * conjugator
+                lamination = workspace.lamination()
+                peripheral = peripheral_workspace.lamination()
             
             # Now all arcs should be parallel to edges and there should now be no bipods.
             assert all(lamination.left_weight(edge) >= 0 for edge in lamination.triangulation.edges)
@@ -759,3 +881,163 @@ class IntegralLamination(Lamination):
         
         return short, conjugator
 
+
+class UnresolvedLamination(IntegralLamination, resolved=False):
+    ''' This represents an IntegralLamination whose finest class has not been determined yet.
+    
+    Lamination.promote returns these so that building a lamination does not require shortening it. The first time
+    its class is needed, that is when kind() is called, when it is checked whether it is an instance of a finer class
+    or when a method of a finer class is called, it changes its class in place to the result of kind().
+    Printing and pickling also resolve it so that users only ever see the finer class. '''
+    
+    __slots__ = []
+    
+    @staticmethod
+    def resolving(name):
+        ''' Return a method that resolves the class of self before calling the method with the given name. '''
+        
+        def method(self, *args, **kwargs):
+            self.kind()
+            return getattr(self, name)(*args, **kwargs)
+        
+        method.__name__ = name
+        return method
+    
+    def __repr__(self):
+        self.kind()
+        return repr(self)
+    def __str__(self):
+        self.kind()
+        return str(self)
+    def __dir__(self):
+        self.kind()
+        return dir(self)
+    def __reduce__(self):
+        self.kind()
+        return self.__reduce__()
+    
+    def kind(self):
+        kind = super().kind()
+        self.__class__ = kind  # pylint: disable=attribute-defined-outside-init
+        return kind
+
+def _intersection_row(laminations):
+    ''' Return the intersection numbers between the first of the given laminations and all of them. '''
+    
+    return laminations[0].intersections(laminations)
+
+def intersection_matrix(laminations, processes=None):
+    ''' Return the symmetric matrix M = {i(laminations[i], laminations[j])}_{ij}.
+    
+    Each lamination is shortened only once, so this is much faster than computing the intersection numbers pairwise.
+    If processes is given then the rows are computed in parallel using a pool of that many worker processes. '''
+    
+    laminations = list(laminations)
+    assert all(isinstance(lamination, IntegralLamination) for lamination in laminations)
+    assert all(lamination.triangulation == laminations[0].triangulation for lamination in laminations)
+    
+    # Row i only needs the intersections with laminations[i:] since the rest follow by symmetry.
+    tails = [laminations[index:] for index in range(len(laminations))]
+    if processes is None:
+        rows = [_intersection_row(tail) for tail in tails]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            rows = list(executor.map(_intersection_row, tails))
+    
+    M = np.zeros((len(laminations), len(laminations)), dtype=object)
+    for index, row in enumerate(rows):
+        M[index, index:] = row
+        M[index:, index] = row
+    
+    return M
+
+class LaminationWorkspace:
+    ''' A mutable copy of a lamination that can be moved through EdgeFlips in place.
+    
+    This keeps the weights and the dual weights of the lamination in flat lists indexed by label + zeta.
+    Since flipping an edge only changes its own weight and the dual weights in the two triangles that
+    contain it, applying an EdgeFlip takes constant time rather than building a new Lamination. Other
+    moves are applied by building the Lamination, moving it and reloading the result.
+    
+    This is used internally by IntegralLamination.shorten. '''
+    def __init__(self, lamination):
+        self.load(lamination)
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return 'Workspace of %s' % self.lamination()
+    
+    def load(self, lamination):
+        ''' Reset this workspace to contain the given lamination. '''
+        
+        assert isinstance(lamination, Lamination)
+        
+        self.kind = lamination.__class__
+        self.triangulation = lamination.triangulation
+        self.zeta = lamination.zeta
+        self.geometric = list(lamination.geometric)
+        if lamination._dual is None: lamination._build_side_weights()  # pylint: disable=protected-access
+        self.dual = list(lamination._dual)  # pylint: disable=protected-access
+        self.weight = lamination.weight()
+    
+    def lamination(self):
+        ''' Return the Lamination that this workspace currently contains. '''
+        
+        return self.kind(self.triangulation, self.geometric)  # Avoids promote.
+    
+    def dual_weight(self, label):
+        ''' Return the dual weight of the given label, as in Lamination.dual_weight. '''
+        
+        return self.dual[label + self.zeta]
+    
+    def left_weight(self, label):
+        ''' Return the left weight of the given label, as in Lamination.left_weight. '''
+        
+        return self.dual[self.triangulation._next[label + self.zeta] + self.zeta]  # pylint: disable=protected-access
+    
+    def weight_after_flip(self, label):
+        ''' Return what the weight of this lamination would be after flipping the given (flippable) label. '''
+        
+        zeta = self.zeta
+        T = self.triangulation
+        weights = self.geometric
+        ai0, bi0, ci0, di0 = [max(weights[x if x >= 0 else ~x], 0) for x in [T._next[label + zeta], T._prev[label + zeta], T._next[~label + zeta], T._prev[~label + zeta]]]  # pylint: disable=protected-access
+        index = label if label >= 0 else ~label
+        return self.weight - max(weights[index], 0) + max(curver.kernel.moves.flip_weight(weights[index], ai0, bi0, ci0, di0), 0)
+    
+    def _update_duals(self, label):
+        ''' Recompute the dual weights in the triangle containing the given label. '''
+        
+        zeta = self.zeta
+        T = self.triangulation
+        geometric = self.geometric
+        i = label
+        j = T._next[i + zeta]  # pylint: disable=protected-access
+        k = T._next[j + zeta]  # pylint: disable=protected-access
+        a, b, c = geometric[i if i >= 0 else ~i], geometric[j if j >= 0 else ~j], geometric[k if k >= 0 else ~k]
+        af, bf, cf = max(a, 0), max(b, 0), max(c, 0)  # Correct for negatives.
+        correction = min(af + bf - cf, bf + cf - af, cf + af - bf, 0)
+        half = curver.kernel.utilities.half
+        self.dual[i + zeta] = half(bf + cf - af + correction)
+        self.dual[j + zeta] = half(cf + af - bf + correction)
+        self.dual[k + zeta] = half(af + bf - cf + correction)
+    
+    def apply(self, encoding):
+        ''' Move this workspace through the given encoding. '''
+        
+        assert encoding.source_triangulation == self.triangulation
+        
+        if len(encoding) == 1 and isinstance(encoding.sequence[0], curver.kernel.EdgeFlip):
+            flip = encoding.sequence[0]
+            weights = self.geometric
+            e = flip.edge.index
+            ai0, bi0, ci0, di0, _ = [max(weights[index], 0) for index in flip._square_indices]  # pylint: disable=protected-access
+            new = curver.kernel.moves.flip_weight(weights[e], ai0, bi0, ci0, di0)
+            self.weight += max(new, 0) - max(weights[e], 0)
+            weights[e] = new
+            self.triangulation = flip.target_triangulation
+            self._update_duals(e)
+            self._update_duals(~e)
+        else:
+            self.load(encoding(self.lamination()))
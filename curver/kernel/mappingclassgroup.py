@@ -51,6 +51,8 @@ class MappingClassGroup:
         self.pos_mapping_classes = dict(pos_mapping_classes)
         self.neg_mapping_classes = dict((name.swapcase(), pos_mapping_class.inverse()) for name, pos_mapping_class in self.pos_mapping_classes.items())
         self.mapping_classes = dict(list(self.pos_mapping_classes.items()) + list(self.neg_mapping_classes.items()))
+        for mapping_class in self.mapping_classes.values():
+            mapping_class.compile()  # These are applied far more often than they are built.
         
         self.arcs = arcs
         self.curves = curves
@@ -4,8 +4,34 @@ These moves can also track how laminations and homology classes move through tho
 
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 import curver
 
+def flip_weight(ei, ai0, bi0, ci0, di0):
+    ''' Return the weight of the new edge after flipping an edge of weight ei in a square with (corrected) weights ai0, bi0, ci0 & di0.
+    
+    See Lemma 5.1.3 of [Bell15]_ for details of the cases involved in performing a flip. '''
+    
+    if ei >= ai0 + bi0 and ai0 >= di0 and bi0 >= ci0:  # CASE: A(ab)
+        return ai0 + bi0 - ei
+    elif ei >= ci0 + di0 and di0 >= ai0 and ci0 >= bi0:  # CASE: A(cd)
+        return ci0 + di0 - ei
+    elif ei <= 0 and ai0 >= bi0 and di0 >= ci0:  # CASE: D(ad)
+        return ai0 + di0 - ei
+    elif ei <= 0 and bi0 >= ai0 and ci0 >= di0:  # CASE: D(bc)
+        return bi0 + ci0 - ei
+    elif ei >= 0 and ai0 >= bi0 + ei and di0 >= ci0 + ei:  # CASE: N(ad)
+        return ai0 + di0 - 2*ei
+    elif ei >= 0 and bi0 >= ai0 + ei and ci0 >= di0 + ei:  # CASE: N(bc)
+        return bi0 + ci0 - 2*ei
+    elif ai0 + bi0 >= ei and bi0 + ei >= 2*ci0 + ai0 and ai0 + ei >= 2*di0 + bi0:  # CASE: N(ab)
+        return curver.kernel.utilities.half(ai0 + bi0 - ei)
+    elif ci0 + di0 >= ei and di0 + ei >= 2*ai0 + ci0 and ci0 + ei >= 2*bi0 + di0:  # CASE: N(cd)
+        return curver.kernel.utilities.half(ci0 + di0 - ei)
+    else:
+        return max(ai0 + ci0, bi0 + di0) - ei
+
 class Move(ABC):
     ''' A basic move from one triangulation to another. '''
     def __init__(self, source_triangulation, target_triangulation):
@@ -25,6 +51,10 @@ class Move(ABC):
             return self.apply_lamination(other)
         elif isinstance(other, curver.kernel.HomologyClass):
             return self.apply_homology(other)
+        elif isinstance(other, curver.kernel.LaminationBatch):
+            return self.apply_lamination_batch(other)
+        elif isinstance(other, curver.kernel.ProjectiveLamination):
+            return self.apply_projective(other)
         else:
             raise TypeError('Unknown type %s' % other)
     def __eq__(self, other):
@@ -53,6 +83,36 @@ class Move(ABC):
     @abstractmethod
     def apply_homology(self, homology_class):  # pylint: disable=no-self-use,unused-argument
         ''' Return the homology class obtained by mapping the given homology class through this move. '''
+    
+    def apply_lamination_batch(self, batch):
+        ''' Return the LaminationBatch obtained by mapping each lamination of the given LaminationBatch through this move.
+        
+        By default this maps the laminations one at a time but subclasses override this to work on the whole array at once. '''
+        
+        return curver.kernel.LaminationBatch.from_laminations(self.target_triangulation, [self.apply_lamination(lamination) for lamination in batch.laminations(promote=False)])
+    
+    def apply_projective(self, lamination):
+        ''' Return the ProjectiveLamination obtained by mapping the given ProjectiveLamination through this move.
+        
+        By default this uses apply_lamination, which works for moves that only use lamination.geometric and lamination.__class__. '''
+        
+        image = self.apply_lamination(lamination)  # This is normalised with its own log_scale.
+        image.log_scale += lamination.log_scale
+        return image
+    
+    def combine(self, other):  # pylint: disable=no-self-use,unused-argument
+        ''' Return a list of moves, in the same order as Encoding.sequence, equal to other * self or None if there is no simpler such list.
+        
+        The returned list has fewer than two moves and so repeatedly combining adjacent moves always terminates. See Encoding.reduce. '''
+        
+        return None
+    
+    def instructions(self):
+        ''' Return a list of instructions that perform this move on a list of weights. See curver.kernel.compiled.
+        
+        By default this is a single MOVE instruction, which uses apply_lamination, but subclasses override this to use FLIP and PERMUTE instructions. '''
+        
+        return [(curver.kernel.compiled.MOVE, self)]
 
 class FlipGraphMove(Move):
     ''' A Move between two triangulations in the same flip graph. '''
@@ -84,6 +144,9 @@ class Isometry(FlipGraphMove):
         # Store the inverses too while we're at it.
         self.inverse_label_map = dict((self.label_map[label], label) for label in self.source_triangulation.labels)
         self.inverse_index_map = dict((index, curver.kernel.norm(self.inverse_label_map[index])) for index in self.source_triangulation.indices)
+        # And as lists indexed by the indices of target_triangulation, for applying this quickly.
+        self._inverse_labels = [self.inverse_label_map[index] for index in self.source_triangulation.indices]
+        self._inverse_indices = [self.inverse_index_map[index] for index in self.source_triangulation.indices]
     
     def __str__(self):
         return 'Isometry ' + str([curver.kernel.Edge(self.label_map[index]) for index in self.source_triangulation.indices])
@@ -97,13 +160,30 @@ class Isometry(FlipGraphMove):
         return self.label_map == other.label_map
     
     def apply_lamination(self, lamination):
-        geometric = [lamination(self.inverse_index_map[index]) for index in self.source_triangulation.indices]
+        weights = lamination.geometric
+        geometric = [weights[index] for index in self._inverse_indices]
         return lamination.__class__(self.target_triangulation, geometric)  # Avoids promote.
     
+    def apply_lamination_batch(self, batch):
+        return curver.kernel.LaminationBatch(self.target_triangulation, batch.geometric[:, self._inverse_indices])
+    
     def apply_homology(self, homology_class):
-        algebraic = [homology_class(self.inverse_label_map[index]) for index in self.source_triangulation.indices]
+        algebraic = [homology_class(label) for label in self._inverse_labels]
         return curver.kernel.HomologyClass(self.target_triangulation, algebraic)
     
+    def instructions(self):
+        return [] if self.is_identity() else [(curver.kernel.compiled.PERMUTE, self._inverse_indices)]
+    
+    def combine(self, other):
+        if isinstance(other, Isometry):  # Compose the label maps.
+            label_map = dict((label, other.label_map[self.label_map[label]]) for label in self.source_triangulation.labels)
+            if all(key == value for key, value in label_map.items()):
+                return []
+            
+            return [curver.kernel.create.isometry(self.source_triangulation, other.target_triangulation, label_map)]
+        
+        return None
+    
     def flip_mapping(self):
         return self.encode()
     
@@ -123,6 +203,7 @@ class EdgeFlip(FlipGraphMove):
         assert self.source_triangulation.is_flippable(self.edge)
         
         self.square = self.source_triangulation.square(self.edge)
+        self._square_indices = [edge.index for edge in self.square]  # For applying this quickly.
     
     def __str__(self):
         return 'Flip %s' % self.edge
@@ -138,33 +219,23 @@ class EdgeFlip(FlipGraphMove):
     def apply_lamination(self, lamination):
         ''' See Lemma 5.1.3 of [Bell15]_ for details of the cases involved in performing a flip. '''
         
-        ei = lamination(self.edge)
-        ai0, bi0, ci0, di0, ei0 = [max(lamination(edge), 0) for edge in self.square]
+        weights = lamination.geometric
+        ai0, bi0, ci0, di0, _ = [max(weights[index], 0) for index in self._square_indices]
         
         # Most of the new information matches the old, so we'll take a copy and modify the places that have changed.
-        geometric = list(lamination.geometric)
-        
-        if ei >= ai0 + bi0 and ai0 >= di0 and bi0 >= ci0:  # CASE: A(ab)
-            geometric[self.edge.index] = ai0 + bi0 - ei
-        elif ei >= ci0 + di0 and di0 >= ai0 and ci0 >= bi0:  # CASE: A(cd)
-            geometric[self.edge.index] = ci0 + di0 - ei
-        elif ei <= 0 and ai0 >= bi0 and di0 >= ci0:  # CASE: D(ad)
-            geometric[self.edge.index] = ai0 + di0 - ei
-        elif ei <= 0 and bi0 >= ai0 and ci0 >= di0:  # CASE: D(bc)
-            geometric[self.edge.index] = bi0 + ci0 - ei
-        elif ei >= 0 and ai0 >= bi0 + ei and di0 >= ci0 + ei:  # CASE: N(ad)
-            geometric[self.edge.index] = ai0 + di0 - 2*ei
-        elif ei >= 0 and bi0 >= ai0 + ei and ci0 >= di0 + ei:  # CASE: N(bc)
-            geometric[self.edge.index] = bi0 + ci0 - 2*ei
-        elif ai0 + bi0 >= ei and bi0 + ei >= 2*ci0 + ai0 and ai0 + ei >= 2*di0 + bi0:  # CASE: N(ab)
-            geometric[self.edge.index] = curver.kernel.utilities.half(ai0 + bi0 - ei)
-        elif ci0 + di0 >= ei and di0 + ei >= 2*ai0 + ci0 and ci0 + ei >= 2*bi0 + di0:  # CASE: N(cd)
-            geometric[self.edge.index] = curver.kernel.utilities.half(ci0 + di0 - ei)
-        else:
-            geometric[self.edge.index] = max(ai0 + ci0, bi0 + di0) - ei
+        geometric = list(weights)
+        geometric[self.edge.index] = flip_weight(weights[self.edge.index], ai0, bi0, ci0, di0)
         
         return lamination.__class__(self.target_triangulation, geometric)  # Avoids promote.
     
+    def apply_lamination_batch(self, batch):
+        weights = curver.kernel.batch.widen(batch.geometric, self._square_indices)  # Only the weights in the square matter.
+        ai0, bi0, ci0, di0, _ = [np.maximum(weights[:, index], 0) for index in self._square_indices]
+        
+        geometric = weights.copy()
+        geometric[:, self.edge.index] = curver.kernel.batch.flip_weights(weights[:, self.edge.index], ai0, bi0, ci0, di0)
+        return curver.kernel.LaminationBatch(self.target_triangulation, geometric)
+    
     def apply_homology(self, homology_class):
         a, b, c, d, e = self.square
         
@@ -176,6 +247,12 @@ class EdgeFlip(FlipGraphMove):
         
         return curver.kernel.HomologyClass(self.target_triangulation, algebraic)
     
+    def instructions(self):
+        return [(curver.kernel.compiled.FLIP, self.edge.index) + tuple(self._square_indices[:4])]
+    
+    def combine(self, other):
+        return [] if other == self.inverse() else None  # Flipping back.
+    
     def flip_mapping(self):
         return self.encode()
 
@@ -186,6 +263,9 @@ class MultiEdgeFlip(FlipGraphMove):
         
         self.edges = set(curver.kernel.Edge(edge) if isinstance(edge, curver.IntegerType) else edge for edge in edges)  # If given any integers.
         self.squares = dict((edge, self.source_triangulation.square(edge)) for edge in self.edges)
+        self._square_indices = dict((edge, [e.index for e in square]) for edge, square in self.squares.items())  # For applying this quickly.
+        self._edge_indices = [edge.index for edge in self.edges]  # For applying this to a LaminationBatch.
+        self._side_indices = [[self._square_indices[edge][i] for edge in self.edges] for i in range(4)]
         
         support = set(self.source_triangulation.triangle_lookup[e] for edge in edges for e in [edge, ~edge])
         assert len(support) == 2 * len(edges)  # Check disjoint support.
@@ -206,32 +286,25 @@ class MultiEdgeFlip(FlipGraphMove):
         ''' See Lemma 5.1.3 of [Bell15]_ for details of the cases involved in performing a flip. '''
         
         # Most of the new information matches the old, so we'll take a copy and modify the places that have changed.
-        geometric = list(lamination.geometric)
+        weights = lamination.geometric
+        geometric = list(weights)
         
         for edge in self.edges:
-            ei = lamination(edge)
-            ai0, bi0, ci0, di0, ei0 = [max(lamination(e), 0) for e in self.squares[edge]]
-            if ei >= ai0 + bi0 and ai0 >= di0 and bi0 >= ci0:  # CASE: A(ab)
-                geometric[edge.index] = ai0 + bi0 - ei
-            elif ei >= ci0 + di0 and di0 >= ai0 and ci0 >= bi0:  # CASE: A(cd)
-                geometric[edge.index] = ci0 + di0 - ei
-            elif ei <= 0 and ai0 >= bi0 and di0 >= ci0:  # CASE: D(ad)
-                geometric[edge.index] = ai0 + di0 - ei
-            elif ei <= 0 and bi0 >= ai0 and ci0 >= di0:  # CASE: D(bc)
-                geometric[edge.index] = bi0 + ci0 - ei
-            elif ei >= 0 and ai0 >= bi0 + ei and di0 >= ci0 + ei:  # CASE: N(ad)
-                geometric[edge.index] = ai0 + di0 - 2*ei
-            elif ei >= 0 and bi0 >= ai0 + ei and ci0 >= di0 + ei:  # CASE: N(bc)
-                geometric[edge.index] = bi0 + ci0 - 2*ei
-            elif ai0 + bi0 >= ei and bi0 + ei >= 2*ci0 + ai0 and ai0 + ei >= 2*di0 + bi0:  # CASE: N(ab)
-                geometric[edge.index] = curver.kernel.utilities.half(ai0 + bi0 - ei)
-            elif ci0 + di0 >= ei and di0 + ei >= 2*ai0 + ci0 and ci0 + ei >= 2*bi0 + di0:  # CASE: N(cd)
-                geometric[edge.index] = curver.kernel.utilities.half(ci0 + di0 - ei)
-            else:
-                geometric[edge.index] = max(ai0 + ci0, bi0 + di0) - ei
+            ai0, bi0, ci0, di0, _ = [max(weights[index], 0) for index in self._square_indices[edge]]
+            geometric[edge.index] = flip_weight(weights[edge.index], ai0, bi0, ci0, di0)
         
         return lamination.__class__(self.target_triangulation, geometric)  # Avoids promote.
     
+    def apply_lamination_batch(self, batch):
+        weights = curver.kernel.batch.widen(batch.geometric)
+        geometric = weights.copy()
+        
+        # Since the squares have disjoint support, we can flip all of the edges at once.
+        ai0, bi0, ci0, di0 = [np.maximum(weights[:, self._side_indices[i]], 0) for i in range(4)]
+        geometric[:, self._edge_indices] = curver.kernel.batch.flip_weights(weights[:, self._edge_indices], ai0, bi0, ci0, di0)
+        
+        return curver.kernel.LaminationBatch(self.target_triangulation, geometric)
+    
     def apply_homology(self, homology_class):
         algebraic = list(homology_class)
         
@@ -245,6 +318,13 @@ class MultiEdgeFlip(FlipGraphMove):
         
         return curver.kernel.HomologyClass(self.target_triangulation, algebraic)
     
+    def instructions(self):
+        # Since the squares have disjoint support, flipping the edges one at a time has the same effect.
+        return [(curver.kernel.compiled.FLIP, edge.index) + tuple(self._square_indices[edge][:4]) for edge in self.edges]
+    
+    def combine(self, other):
+        return [] if other == self.inverse() else None  # Flipping back.
+    
     def flip_mapping(self):
         return self.source_triangulation.encode([edge.label for edge in self.edges])
 
@@ -1,11 +1,55 @@
 
 ''' A module for representing permutations in Sym(N). '''
 
-from bisect import bisect
 from itertools import combinations
-from math import factorial
 import numpy as np
 
+def _to_mixed_radix(digits, radices):
+    ''' Return the integer whose digits, most significant first, in the given mixed radix are digits.
+    
+    The digits are combined by divide and conquer so that the big integer multiplications are balanced. '''
+    
+    layer = list(zip(digits, radices))  # Pairs (value, product of radices) of consecutive blocks.
+    while len(layer) > 1:
+        layer = [(a * q + b, p * q) for (a, p), (b, q) in zip(layer[::2], layer[1::2])] + ([layer[-1]] if len(layer) % 2 else [])
+    return layer[0][0] if layer else 0
+
+def _from_mixed_radix(value, radices):
+    ''' Return the digits, most significant first, of value in the given mixed radix.
+    
+    This is the inverse of _to_mixed_radix and requires 0 <= value < product(radices). '''
+    
+    if not radices:
+        assert value == 0
+        return []
+    
+    # Build the tree of products of radices of consecutive blocks.
+    products = {}
+    
+    def product(lo, hi):
+        ''' Return the product of radices[lo:hi], recording it and those of its sub-blocks. '''
+        if hi - lo == 1:
+            products[lo, hi] = radices[lo]
+        else:
+            mid = (lo + hi) // 2
+            products[lo, hi] = product(lo, mid) * product(mid, hi)
+        return products[lo, hi]
+    
+    assert 0 <= value < product(0, len(radices))
+    
+    digits = [0] * len(radices)
+    to_do = [(value, 0, len(radices))]
+    while to_do:
+        value, lo, hi = to_do.pop()
+        if hi - lo == 1:
+            digits[lo] = value
+        else:
+            mid = (lo + hi) // 2
+            high, low = divmod(value, products[mid, hi])
+            to_do.append((high, lo, mid))
+            to_do.append((low, mid, hi))
+    return digits
+
 class Permutation:
     ''' This represents a permutation on 0, 1, ..., N-1. '''
     def __init__(self, perm):
@@ -92,26 +136,48 @@ class Permutation:
     def from_index(cls, N, index):
         ''' Return the permutation in Sym(N) with the given index. '''
         
+        # The index is the Lehmer code of the permutation written in the mixed radix N, N-1, ..., 1.
+        # The ith digit says which of the remaining symbols comes next, which we find by binary
+        # lifting in a Fenwick tree recording which symbols remain.
+        digits = _from_mixed_radix(index, list(range(N, 0, -1)))
+        tree = [i & -i for i in range(N + 1)]  # The Fenwick tree of [1] * N.
+        top = 1 << N.bit_length()
         P = []
-        f = factorial(N)
-        symbols = list(range(N))
-        while symbols:
-            f = f // len(symbols)
-            i, index = divmod(index, f)
-            P.append(symbols[i])
-            symbols = symbols[:i] + symbols[i+1:]
+        for digit in digits:
+            position, remaining = 0, digit  # Find the (digit+1)st remaining symbol.
+            step = top
+            while step:
+                if position + step <= N and tree[position + step] <= remaining:
+                    position += step
+                    remaining -= tree[position]
+                step >>= 1
+            P.append(position)
+            i = position + 1
+            while i <= N:
+                tree[i] -= 1
+                i += i & -i
         return cls(P)
     
     def index(self):
         ''' Return the index of this permutation in the (sorted) list of all permutations on this many symbols. '''
         
-        symbols = sorted(self.perm)
-        index = 0
+        # Compute the Lehmer code of this permutation, that is, how many of the remaining
+        # symbols are smaller than each one, using a Fenwick tree recording which symbols remain.
+        N = len(self)
+        tree = [i & -i for i in range(N + 1)]  # The Fenwick tree of [1] * N.
+        digits = []
         for p in self:
-            i = bisect(symbols, p) - 1
-            index = index * len(symbols) + i
-            symbols = symbols[:i] + symbols[i+1:]
-        return index
+            digit = 0
+            i = p
+            while i:
+                digit += tree[i]
+                i -= i & -i
+            digits.append(digit)
+            i = p + 1
+            while i <= N:
+                tree[i] -= 1
+                i += i & -i
+        return _to_mixed_radix(digits, list(range(N, 0, -1)))
     
     def matrix(self):
         ''' Return the corresponding permutation matrix.
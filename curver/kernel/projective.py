@@ -0,0 +1,78 @@
+
+''' A module for representing laminations up to scale using floating point weights.
+
+This is useful for repeatedly applying a mapping class to a lamination, for example to estimate its
+stretch factor or its attracting lamination. After each move the weights are rescaled so that the
+largest has absolute value 1 and the (natural) logarithm of the scale factor removed is accumulated
+in log_scale. Hence the weights never grow, unlike those of an IntegralLamination, and each move takes
+constant time per edge. '''
+
+from math import exp, log
+
+import curver
+
+TOLERANCE = 1e-12  # Normalised weights (and intersections) smaller than this are indistinguishable from zero.
+
+class ProjectiveLamination:
+    ''' This represents a lamination on a triangulation up to scale.
+    
+    The (approximate) geometric vector of the lamination is exp(log_scale) times the geometric vector of this object.
+    
+    Users should create these via ProjectiveLamination.from_lamination(...). '''
+    def __init__(self, triangulation, geometric, log_scale=0.0):
+        assert isinstance(triangulation, curver.kernel.Triangulation)
+        
+        self.triangulation = triangulation
+        self.zeta = self.triangulation.zeta
+        
+        scale = max(max(geometric), -min(geometric))
+        if scale > 0 and scale != 1:  # Normalise. Most moves do not change the largest weight and so we can often skip this.
+            self.geometric = tuple([weight / scale for weight in geometric])
+            self.log_scale = log_scale + log(scale)
+        else:
+            self.geometric = tuple([float(weight) for weight in geometric])
+            self.log_scale = log_scale
+        assert len(self.geometric) == self.zeta
+    
+    @classmethod
+    def from_lamination(cls, lamination):
+        ''' Return the ProjectiveLamination corresponding to the given lamination. '''
+        
+        assert isinstance(lamination, curver.kernel.Lamination)
+        
+        # Rescale before converting to floats since the weights might be too large to be floats themselves.
+        scale = max(max(lamination), -min(lamination))
+        if scale == 0:
+            return cls(lamination.triangulation, lamination.geometric)
+        
+        return cls(lamination.triangulation, [weight / scale for weight in lamination], log(scale))
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return 'ProjectiveLamination [%s] x exp(%s) on %s' % (', '.join(str(weight) for weight in self.geometric), self.log_scale, self.triangulation)
+    def __iter__(self):
+        return iter(self.geometric)
+    def __call__(self, edge):
+        ''' Return the (normalised) geometric measure assigned to item. '''
+        if isinstance(edge, curver.IntegerType): return self.geometric[edge if edge >= 0 else ~edge]  # If given an integer instead.
+        
+        return self.geometric[edge.index]
+    
+    def weights(self):
+        ''' Return the approximate geometric vector of the lamination that this represents.
+        
+        This may overflow if log_scale is large. '''
+        
+        scale = exp(self.log_scale)
+        return [weight * scale for weight in self]
+    
+    def is_close(self, other, tolerance=1e-9):
+        ''' Return whether this and other are the same projective lamination up to the given tolerance.
+        
+        other may be a ProjectiveLamination or a Lamination. '''
+        
+        if isinstance(other, curver.kernel.Lamination):
+            other = ProjectiveLamination.from_lamination(other)
+        
+        return self.triangulation == other.triangulation and all(abs(x - y) <= tolerance for x, y in zip(self, other))
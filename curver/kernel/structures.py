@@ -1,8 +1,11 @@
 
 ''' A module of data structures. '''
 
-from collections import defaultdict, namedtuple
+from array import array
+from collections import defaultdict, deque, namedtuple
+from heapq import heappop, heappush
 from itertools import chain, islice
+import weakref
 import numpy as np
 
 import curver
@@ -35,9 +38,9 @@ class UnionFind:
     def union2(self, x, y):
         ''' Combine the class containing x and the class containing y. '''
         rx, ry = self(x), self(y)
-        if self.rank[x] > self.rank[y]:
+        if self.rank[rx] > self.rank[ry]:
             self.parent[ry] = rx
-        elif self.rank[x] < self.rank[y]:
+        elif self.rank[rx] < self.rank[ry]:
             self.parent[rx] = ry
         elif rx != ry:
             self.parent[ry] = rx
@@ -48,6 +51,327 @@ class UnionFind:
         for item in args:
             self.union2(args[0], item)
 
+class IntegerUnionFind:
+    ''' A fast union--find data structure on the integers 0, 1, ..., n-1.
+    
+    This is a drop in replacement for UnionFind(range(n)) that stores its parents and ranks in flat typed arrays. '''
+    def __init__(self, n):
+        self.parent = array('l', range(n))
+        self.rank = bytearray(n)  # Ranks are at most log2(n).
+    def __iter__(self):
+        ''' Iterate through the groups of self.
+        
+        Each group is sorted and the groups are ordered by their smallest items. '''
+        groups = defaultdict(list)
+        for item in range(len(self.parent)):
+            groups[self(item)].append(item)
+        return iter(groups.values())
+    def __len__(self):
+        return sum(1 if root == item else 0 for item, root in enumerate(self.parent))
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return ', '.join('{' + ', '.join(str(item) for item in g) + '}' for g in self)
+    def __call__(self, x):
+        ''' Find the root of x. Two items are in the same group iff they have the same root. '''
+        parent = self.parent
+        while parent[x] != x:  # Path halving.
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    def union2(self, x, y):
+        ''' Combine the class containing x and the class containing y. '''
+        rx, ry = self(x), self(y)
+        if rx == ry:
+            return
+        if self.rank[rx] < self.rank[ry]:
+            rx, ry = ry, rx
+        self.parent[ry] = rx
+        if self.rank[rx] == self.rank[ry]:
+            self.rank[rx] += 1
+    def union(self, *args):
+        ''' Combine all of the classes containing the given items. '''
+        if len(args) == 1: args = args[0]
+        for item in args:
+            self.union2(args[0], item)
+    def union_pairs(self, xs, ys):
+        ''' Combine the class containing xs[i] and the class containing ys[i] for each i. '''
+        for x, y in zip(xs, ys):
+            self.union2(x, y)
+
+class BucketQueue:
+    ''' A priority queue of items each of which has one of a small number of different priorities.
+    
+    The priority of an item can be changed at any time. Each priority has a heap of the items that
+    may have it and items whose priority has since changed are only removed when they reach the top. '''
+    def __init__(self, priorities=None):
+        self.priority = dict()
+        self.buckets = defaultdict(list)
+        for item, priority in (priorities or dict()).items():
+            self[item] = priority
+    def __len__(self):
+        return len(self.priority)
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return str(self.priority)
+    def __getitem__(self, item):
+        return self.priority[item]
+    def __setitem__(self, item, priority):
+        if item not in self.priority or self.priority[item] != priority:
+            self.priority[item] = priority
+            if priority:  # Items with a falsy priority are never returned by peek so there is no need to store them in a bucket.
+                heappush(self.buckets[priority], item)
+    def peek(self):
+        ''' Return the smallest item with the largest priority, or None if every item has a falsy priority. '''
+        for priority in sorted(self.buckets, reverse=True):
+            bucket = self.buckets[priority]
+            while bucket and self.priority[bucket[0]] != priority:  # Lazily remove items that no longer have this priority.
+                heappop(bucket)
+            if bucket:
+                return bucket[0]
+        
+        return None
+
+class InternTable:
+    ''' A table of canonical instances of objects, keyed by a hashable description of them.
+    
+    The table only holds weak references and so does not keep its objects alive by itself.
+    However, to stop short-lived objects from repeatedly dropping out of the table and being
+    rebuilt, strong references to the (at most) size most recently added objects are also kept. '''
+    def __init__(self, size):
+        self.table = weakref.WeakValueDictionary()
+        self.recent = deque(maxlen=size)
+    def __len__(self):
+        return len(self.table)
+    def __contains__(self, key):
+        return key in self.table
+    def __call__(self, key, item):
+        ''' Return the canonical object with the given key.
+        
+        If there is no such object then item becomes the canonical object for this key. '''
+        canonical = self.table.get(key)
+        if canonical is None:
+            self.table[key] = canonical = item
+            self.recent.append(canonical)
+        return canonical
+
+
+class Rope:
+    ''' A persistent sequence, stored as a balanced binary tree whose leaves are short tuples.
+    
+    Ropes are never modified and so the Ropes built from them can share structure. Hence concatenating two Ropes takes
+    O(log n) time (and O(1) when they have similar heights), slicing takes O(log n) time and repeating a Rope k times
+    only builds O(log k) new nodes. A Rope can also be reversed lazily, applying an involution to each item as it goes.
+    
+    Users should create these via Rope(items). '''
+    CHUNK = 32  # The largest leaf built by merging two leaves.
+    __slots__ = ['length', 'height', 'leaf', 'children', 'source']
+    def __init__(self, items=()):
+        items = tuple(items)
+        
+        # Build a balanced tree bottom up.
+        level = [Rope.from_leaf(items[i:i+self.CHUNK]) for i in range(0, len(items), self.CHUNK)] or [Rope.from_leaf(())]
+        while len(level) > 1:
+            level = [Rope.from_children(*level[i:i+2]) if i+1 < len(level) else level[i] for i in range(0, len(level), 2)]
+        
+        self.length, self.height, self.leaf, self.children, self.source = level[0].length, level[0].height, level[0].leaf, level[0].children, level[0].source
+    
+    @classmethod
+    def from_leaf(cls, items):
+        ''' Return the Rope with a single leaf containing the given tuple of items. '''
+        
+        rope = object.__new__(cls)
+        rope.length, rope.height, rope.leaf, rope.children, rope.source = len(items), 0, items, None, None
+        return rope
+    
+    @classmethod
+    def from_children(cls, left, right):
+        ''' Return the Rope of left followed by right, without rebalancing.
+        
+        If left and right are both small leaves then they are merged instead. '''
+        
+        if left.leaf is not None and right.leaf is not None and left.length + right.length <= cls.CHUNK:
+            return cls.from_leaf(left.leaf + right.leaf)
+        
+        rope = object.__new__(cls)
+        rope.length, rope.height, rope.leaf, rope.children, rope.source = left.length + right.length, max(left.height, right.height) + 1, None, (left, right), None
+        return rope
+    
+    def expose(self):
+        ''' Return the pair (leaf, children) of this node, exactly one of which is not None.
+        
+        If this Rope is a lazy reversal of another then this reverses one more level of it. '''
+        
+        if self.source is not None:
+            base, involution = self.source
+            leaf, children = base.expose()
+            if leaf is not None:
+                self.leaf = tuple(reversed(leaf)) if involution is None else tuple(involution(item) for item in reversed(leaf))
+            else:
+                self.children = (children[1].reverse(involution), children[0].reverse(involution))
+            self.source = None
+        
+        return self.leaf, self.children
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return str(list(self))
+    def __len__(self):
+        return self.length
+    def __iter__(self):
+        stack = [self]
+        while stack:
+            leaf, children = stack.pop().expose()
+            if leaf is not None:
+                yield from leaf
+            else:
+                stack.append(children[1])
+                stack.append(children[0])
+    def __reversed__(self):
+        stack = [self]
+        while stack:
+            leaf, children = stack.pop().expose()
+            if leaf is not None:
+                yield from reversed(leaf)
+            else:
+                stack.append(children[0])
+                stack.append(children[1])
+    def __eq__(self, other):
+        if isinstance(other, (Rope, list, tuple)):
+            return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+        else:
+            return NotImplemented
+    def __getitem__(self, value):
+        if isinstance(value, slice):
+            start, stop, step = value.indices(len(self))
+            if step != 1:
+                return Rope(tuple(self)[value])
+            
+            return self.slice(start, stop)
+        else:  # We are returning a single item.
+            if value >= len(self) or value < -len(self):
+                raise IndexError('index out of range')
+            if value < 0: value = len(self) + value
+            
+            node = self
+            while True:
+                leaf, children = node.expose()
+                if leaf is not None:
+                    return leaf[value]
+                if value < children[0].length:
+                    node = children[0]
+                else:
+                    value -= children[0].length
+                    node = children[1]
+    
+    def slice(self, start, stop):
+        ''' Return the Rope of self[start:stop]. '''
+        
+        if start <= 0 and stop >= self.length:
+            return self
+        if start >= stop or stop <= 0 or start >= self.length:
+            return Rope.from_leaf(())
+        
+        leaf, children = self.expose()
+        if leaf is not None:
+            return Rope.from_leaf(leaf[max(start, 0):stop])
+        
+        left, right = children
+        return left.slice(start, stop) + right.slice(start - left.length, stop - left.length)
+    
+    def __add__(self, other):
+        if isinstance(other, (list, tuple)):
+            other = Rope(other)
+        
+        if not isinstance(other, Rope):
+            return NotImplemented
+        
+        if not other.length:
+            return self
+        if not self.length:
+            return other
+        if self.height > other.height + 1:
+            return self.join_right(other)
+        if other.height > self.height + 1:
+            return other.join_left(self)
+        
+        return Rope.from_children(self, other)
+    def __radd__(self, other):
+        if isinstance(other, (list, tuple)):
+            return Rope(other) + self
+        else:
+            return NotImplemented
+    
+    # The following implement the join operation on AVL trees, see [BFS16]_.
+    def join_right(self, other):
+        ''' Return the Rope of self followed by other, where self is much taller than other. '''
+        
+        left, right = self.expose()[1]
+        if right.height <= other.height + 1:
+            middle = Rope.from_children(right, other)
+            if middle.height <= left.height + 1:
+                return Rope.from_children(left, middle)
+            return Rope.from_children(left, middle.rotate_right()).rotate_left()
+        
+        middle = right.join_right(other)
+        if middle.height <= left.height + 1:
+            return Rope.from_children(left, middle)
+        return Rope.from_children(left, middle).rotate_left()
+    def join_left(self, other):
+        ''' Return the Rope of other followed by self, where self is much taller than other. '''
+        
+        left, right = self.expose()[1]
+        if left.height <= other.height + 1:
+            middle = Rope.from_children(other, left)
+            if middle.height <= right.height + 1:
+                return Rope.from_children(middle, right)
+            return Rope.from_children(middle.rotate_left(), right).rotate_right()
+        
+        middle = left.join_left(other)
+        if middle.height <= right.height + 1:
+            return Rope.from_children(middle, right)
+        return Rope.from_children(middle, right).rotate_right()
+    def rotate_left(self):
+        ''' Return the Rope (a . b) . c where this Rope is a . (b . c), or this Rope if it does not have this shape. '''
+        
+        _, children = self.expose()
+        if children is None or children[1].expose()[1] is None:
+            return self
+        a, (b, c) = children[0], children[1].children
+        return Rope.from_children(Rope.from_children(a, b), c)
+    def rotate_right(self):
+        ''' Return the Rope a . (b . c) where this Rope is (a . b) . c, or this Rope if it does not have this shape. '''
+        
+        _, children = self.expose()
+        if children is None or children[0].expose()[1] is None:
+            return self
+        (a, b), c = children[0].children, children[1]
+        return Rope.from_children(a, Rope.from_children(b, c))
+    
+    def __mul__(self, k):
+        assert k >= 0
+        
+        result, power = Rope.from_leaf(()), self
+        while k:  # Repeated doubling.
+            if k & 1: result = result + power
+            power, k = power + power, k >> 1
+        return result
+    def __rmul__(self, k):
+        return self * k
+    
+    def reverse(self, involution=None):
+        ''' Return the Rope of [involution(item) for item in reversed(self)], which is built lazily.
+        
+        The involution must satisfy involution(involution(item)) == item, and this is not applied at all if it is None. '''
+        
+        if self.source is not None and self.source[1] is involution:  # Reversing twice cancels.
+            return self.source[0]
+        
+        rope = object.__new__(Rope)
+        rope.length, rope.height, rope.leaf, rope.children, rope.source = self.length, self.height, None, None, (self, involution)
+        return rope
 
 Terminal = namedtuple('Terminal', ['value'])
 
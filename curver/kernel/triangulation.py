@@ -1,13 +1,21 @@
 
 ''' A module for representing a triangulation of a punctured surface. '''
 
-from collections import Counter, namedtuple
+from collections import Counter, deque, namedtuple
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 from functools import total_ordering
 from itertools import product
 import numpy as np
 
 import curver
-from curver.kernel.decorators import memoize  # Special import needed for decorating.
+from curver.kernel.decorators import lazy, memoize  # Special import needed for decorating.
+from curver.kernel.structures import InternTable
+
+# The canonical instances of the triangulations that are currently in use.
+TRIANGULATIONS = InternTable(size=128)
 
 def norm(number):
     ''' A map taking an edges label to its index.
@@ -65,11 +73,14 @@ class Edge:
         
         return +1 if self.label == self.index else -1
 
+@total_ordering
 class Triangle:
     ''' This represents a triangle.
     
     It is specified by a list of three edges, ordered anticlockwise.
-    It builds its corners automatically. '''
+    It builds its corners automatically.
+    
+    Triangles are ordered by their labels. '''
     
     # Warning: This needs to be updated if the internals of this class ever change.
     __slots__ = ['edges', 'labels', 'indices']
@@ -100,6 +111,11 @@ class Triangle:
             return self.edges == other.edges
         else:
             return NotImplemented
+    def __lt__(self, other):
+        if isinstance(other, Triangle):
+            return self.labels < other.labels
+        else:
+            return NotImplemented
     def __hash__(self):
         return hash(tuple(self.edges))
     def __len__(self):
@@ -115,52 +131,220 @@ class Triangle:
     def __contains__(self, other):
         return other in self.edges
 
+class LabelMap(Mapping):
+    ''' A read-only dictionary from the edge labels of a triangulation to values that are built on demand.
+    
+    The value for a label is built by builder(label) the first time it is requested and then cached.
+    As with the rest of curver, an Edge may be given instead of a label. '''
+    
+    # Warning: This needs to be updated if the internals of this class ever change.
+    __slots__ = ['zeta', 'builder', 'cache']
+    
+    def __init__(self, zeta, builder):
+        self.zeta = zeta
+        self.builder = builder
+        self.cache = [None] * (2 * zeta)
+    
+    def __repr__(self):
+        return str(self)
+    def __str__(self):
+        return str(dict(self))
+    def __getitem__(self, key):
+        label = key.label if isinstance(key, Edge) else key
+        if not isinstance(label, curver.IntegerType) or not -self.zeta <= label < self.zeta:
+            raise KeyError(key)
+        
+        value = self.cache[label + self.zeta]
+        if value is None:
+            value = self.cache[label + self.zeta] = self.builder(label)
+        return value
+    def __iter__(self):
+        return iter(range(-self.zeta, self.zeta))
+    def __len__(self):
+        return 2 * self.zeta
+
 # Remark: In other places in the code you will often see L(triangulation). This is the space
 # of laminations on triangulation with the coordinate system induced by the triangulation.
 
 class Triangulation:
     ''' This represents a triangulation of a punctured surface.
     
-    It is specified by a list of Triangles. Its edges must be numbered 0, 1, ... '''
+    It is specified by a list of Triangles. Its edges must be numbered 0, 1, ...
+    
+    Triangulations built via Triangulation.from_tuple, Triangulation.from_sig or by moves are interned.
+    That is, there is only ever one canonical instance of each triangulation and any other instance that is
+    equal to it shares its state, including everything that it has memoized. Those built by moves are only
+    interned when they are first hashed or compared, see Triangulation.interned. '''
+    
     def __init__(self, triangles):
-        # We will sort the triangles into a canonical ordering, the one where the edges are ordered
-        # minimally by label. This allows for fast comparisons.
-        self.triangles = sorted(triangles, key=lambda t: t.labels)
-        self.num_triangles = len(self.triangles)
+        self.num_triangles = len(triangles)
         self.zeta = self.num_triangles * 3 // 2  # = self.num_edges.
-        self.indices = [index for index in range(self.zeta)]  # pylint: disable=unnecessary-comprehension
-        self.labels = [label for label in range(-self.zeta, self.zeta)]  # pylint: disable=unnecessary-comprehension
-        self.edges = [Edge(label) for label in self.labels]
-        self.positive_edges = [Edge(index) for index in self.indices]
         
-        self.triangle_lookup = dict((edge.label, triangle) for triangle in self for edge in triangle)
-        self.corner_lookup = dict((edge.label, Triangle(triangle.edges, rotate=index)) for triangle in self for index, edge in enumerate(triangle))
+        # The combinatorics of the triangulation is stored in flat tables indexed by label + zeta:
+        #  - _next[label + zeta] and _prev[label + zeta] are the labels after and before label, going anticlockwise around its triangle,
+        #  - _triangle[label + zeta] is the id of the triangle containing label, that is, its position in self._triangles, and
+        #  - _vertex[label + zeta] is the id of the vertex at the tail of label, that is, its position in self._vertices.
+        # Ids are stable under flips, which replace the triangles and vertices that they change in place.
+        # Everything else, including the vertex tables, is derived from these when it is first needed.
+        zeta = self.zeta
+        self._triangles = list(triangles)
+        self._next = [0] * (2 * zeta)
+        self._prev = [0] * (2 * zeta)
+        self._triangle = [0] * (2 * zeta)
+        for position, triangle in enumerate(self._triangles):
+            a, b, c = triangle.labels
+            self._next[a + zeta], self._next[b + zeta], self._next[c + zeta] = b, c, a
+            self._prev[a + zeta], self._prev[b + zeta], self._prev[c + zeta] = c, a, b
+            self._triangle[a + zeta] = self._triangle[b + zeta] = self._triangle[c + zeta] = position
+    
+    @lazy
+    def indices(self):
+        ''' The list of indices of this triangulation. '''
+        return list(range(self.zeta))
+    
+    @lazy
+    def labels(self):
+        ''' The list of labels of this triangulation. '''
+        return list(range(-self.zeta, self.zeta))
+    
+    @lazy
+    def edges(self):
+        ''' The list of Edges of this triangulation. Note that self.edges[label + self.zeta] is the Edge with this label. '''
+        return [Edge(label) for label in self.labels]
+    
+    @lazy
+    def positive_edges(self):
+        ''' The list of Edges of this triangulation with non-negative labels. '''
+        return self.edges[self.zeta:]
+    
+    @lazy
+    def triangles(self):
+        ''' The triangles of this triangulation in a canonical order, the one where the edges are ordered minimally by label. '''
+        return sorted(self._triangles)
+    
+    @lazy
+    def signature(self):
+        ''' The labels of self.triangles. Two triangulations are the same if and only if they have the same signature. '''
+        return [label for triangle in self.triangles for label in triangle.labels]
+    
+    @lazy
+    def euler_characteristic(self):
+        ''' The Euler characteristic of the underlying surface. '''
+        return -self.zeta // 3  # = V - E + F since 3F = 2E and V = 0.
+    
+    @lazy
+    def _vertex(self):
+        ''' The vertex table. Building this also builds self._vertices. '''
         
         # Group the edges into vertices and ordered anti-clockwise.
         # Here two edges are in the same class iff they have the same tail.
-        unused = set(self.edges)
-        self.vertices = set()
-        while unused:
-            vertex = [min(unused)]  # Make canonical by starting at min.
-            unused.discard(vertex[0])
-            while True:
-                neighbour = ~self.corner_lookup[vertex[-1]][2]
-                if neighbour in unused:
-                    vertex.append(neighbour)
-                    unused.remove(neighbour)
-                else:
-                    break
+        zeta = self.zeta
+        vertex = [-1] * (2 * zeta)
+        vertices = []
+        for label in self.labels:  # Make canonical by starting each vertex at its min label.
+            if vertex[label + zeta] == -1:
+                cycle = []
+                current = label
+                while vertex[current + zeta] == -1:
+                    vertex[current + zeta] = len(vertices)
+                    cycle.append(self.edges[current + zeta])
+                    current = ~self._prev[current + zeta]
+                vertices.append(tuple(cycle))
+        
+        self._vertices = vertices
+        return vertex
+    
+    @lazy
+    def _vertices(self):
+        ''' The list of vertices, each of which is the tuple of Edges coming out of it in anticlockwise order. '''
+        
+        self._vertex  # pylint: disable=pointless-statement
+        return self._vertices
+    
+    @lazy
+    def vertices(self):
+        ''' The set of vertices of this triangulation. '''
+        return set(sorted(self._vertices, key=lambda vertex: vertex[0].label))  # Insert by min label, the order that _vertex builds them in.
+    
+    @lazy
+    def num_vertices(self):
+        ''' The number of vertices of this triangulation. '''
+        return len(self._vertices)
+    
+    @lazy
+    def triangle_lookup(self):
+        ''' A map taking each label to the Triangle containing it. '''
+        zeta = self.zeta
+        return LabelMap(zeta, lambda label: self._triangles[self._triangle[label + zeta]])
+    
+    @lazy
+    def corner_lookup(self):
+        ''' A map taking each label to the Triangle containing it, rotated to start at it. '''
+        zeta = self.zeta
+        return LabelMap(zeta, lambda label: Triangle([self.edges[label + zeta], self.edges[self._next[label + zeta] + zeta], self.edges[self._prev[label + zeta] + zeta]], rotate=0))
+    
+    @lazy
+    def vertex_lookup(self):
+        ''' A map taking each label to the vertex at its tail. '''
+        zeta = self.zeta
+        return LabelMap(zeta, lambda label: self._vertices[self._vertex[label + zeta]])
+    
+    def _flipped(self, edges):
+        ''' Return the triangulation obtained by flipping the given edges.
+        
+        Rather than building this from scratch, we copy the flat tables of this triangulation and patch
+        the two triangles around each edge. Copying these tables is still O(zeta) but it is only a handful
+        of list copies, rather than rebuilding every Triangle and sorting them. Everything derived from these
+        tables, such as the sorted triangles and the vertices, is left to be built if it is needed. The result
+        is not interned until it is hashed or found to be equal to another triangulation, see interned.
+        
+        The given edges must be flippable and have disjoint support. '''
+        
+        zeta = self.zeta
+        computed = self.__dict__
+        
+        flipped = self.__class__.__new__(self.__class__)
+        flipped.num_triangles, flipped.zeta = self.num_triangles, self.zeta
+        # These do not depend on the combinatorics and are never modified so can be shared.
+        for name in ['indices', 'labels', 'edges', 'positive_edges', 'euler_characteristic', 'num_vertices']:
+            if name in computed:
+                setattr(flipped, name, computed[name])
+        flipped._triangles, flipped._next, flipped._prev, flipped._triangle = list(self._triangles), list(self._next), list(self._prev), list(self._triangle)
+        
+        # See encode_multiflip for a picture of the edges involved. The flipped edge goes from being
+        # the diagonal of a, b, c, d to being the diagonal of d, a, b, c where, regardless of the
+        # orientation of the given edge, its positive label now lies in the triangle with d & a.
+        for edge in edges:
+            label = edge if isinstance(edge, curver.IntegerType) else edge.label  # If given an Edge instead.
+            a, b, c, d = self._next[label + zeta], self._prev[label + zeta], self._next[~label + zeta], self._prev[~label + zeta]
+            positive = norm(label)
             
-            self.vertices.add(tuple(vertex))
+            for triangle_id, (x, y, z) in [(self._triangle[label + zeta], (positive, d, a)), (self._triangle[~label + zeta], (~positive, b, c))]:
+                flipped._triangles[triangle_id] = Triangle([self.edges[x + zeta], self.edges[y + zeta], self.edges[z + zeta]])
+                flipped._next[x + zeta], flipped._next[y + zeta], flipped._next[z + zeta] = y, z, x
+                flipped._prev[x + zeta], flipped._prev[y + zeta], flipped._prev[z + zeta] = z, x, y
+                flipped._triangle[x + zeta] = flipped._triangle[y + zeta] = flipped._triangle[z + zeta] = triangle_id
+        
+        return flipped
+    
+    def interned(self):
+        ''' Return the canonical instance of this triangulation.
         
-        self.vertex_lookup = dict((edge.label, vertex) for vertex in self.vertices for edge in vertex)
+        This is the unique interned triangulation that is equal to this one. If there is none then this triangulation becomes it.
+        Otherwise this triangulation starts sharing the state of the canonical one, including everything that it has memoized.
         
-        self.num_vertices = len(self.vertices)
+        Triangulations built by flips are only interned the first time that they are hashed or found to be equal to another
+        triangulation, since building the key of the intern table takes O(zeta) time. '''
         
-        self.euler_characteristic = -self.zeta // 3  # = V - E + F since 3F = 2E and V = 0.
+        if '_key' not in self.__dict__:
+            # Two triangulations are the same if and only if they have the same _next table, so this can be used instead of the signature.
+            self._key = (self.__class__, tuple(self._next))  # pylint: disable=attribute-defined-outside-init
+            self._hash = hash(self._key[1])  # pylint: disable=attribute-defined-outside-init
         
-        # Two triangulations are the same if and only if they have the same signature.
-        self.signature = [edge.label for triangle in self for edge in triangle]
+        canonical = TRIANGULATIONS(self._key, self)
+        if canonical.__dict__ is not self.__dict__:
+            self.__dict__ = canonical.__dict__  # pylint: disable=attribute-defined-outside-init
+        return canonical
     
     @classmethod
     def from_tuple(cls, *edge_labels):
@@ -199,7 +383,7 @@ class Triangulation:
             if ~i not in flattened:
                 raise TypeError('Missing label ~%d' % i)
         
-        return cls([Triangle([Edge(label) for label in labels]) for labels in edge_labels])
+        return cls([Triangle([Edge(label) for label in labels]) for labels in edge_labels]).interned()
     
     @classmethod
     def from_sig(cls, sig):
@@ -225,9 +409,23 @@ class Triangulation:
         # Triangulations are already pickleable but this results in a much smaller pickle.
         return (create_triangulation, (self.__class__,) + self.package())
     def __eq__(self, other):
-        return self.signature == other.signature
+        if self is other:
+            return True
+        elif not isinstance(other, Triangulation):
+            return NotImplemented
+        elif self.__dict__ is other.__dict__:  # Both share the state of the same canonical triangulation.
+            return True
+        elif self._next != other._next:  # Equivalent to comparing signatures but does not need them to be built.
+            return False
+        
+        # Intern both so that they share their state and so later comparisons between them are immediate.
+        self.interned()
+        other.interned()
+        return True
     def __hash__(self):
-        return hash(tuple(self.signature))
+        if '_key' not in self.__dict__:
+            self.interned()
+        return self._hash
     def __call__(self, geometric, promote=True):
         return self.lamination(geometric, promote)
     
@@ -290,13 +488,12 @@ class Triangulation:
     def components(self):
         ''' Return a list of tuples of the edges in each component of self. '''
         
-        classes = curver.kernel.UnionFind(self.edges)
-        for edge in self.edges:
-            classes.union(edge, ~edge)
-        for triangle in self:
-            classes.union(triangle)
+        # Work with label + zeta so that we can use an IntegerUnionFind.
+        classes = curver.kernel.IntegerUnionFind(2 * self.zeta)
+        classes.union_pairs(range(2 * self.zeta), reversed(range(2 * self.zeta)))  # Each label with its inverse.
+        classes.union_pairs(range(2 * self.zeta), [label + self.zeta for label in self._next])  # Each label with the next one around its triangle.
         
-        return [tuple(sorted(cls)) for cls in classes]
+        return [tuple(self.edges[item] for item in cls) for cls in classes]
     
     def is_connected(self):
         ''' Return whether this triangulation has a single component. '''
@@ -315,10 +512,10 @@ class Triangulation:
         
         # Kruskal's algorithm.
         dual_tree = set()
-        classes = curver.kernel.UnionFind(self.triangles)
+        classes = curver.kernel.IntegerUnionFind(self.num_triangles)
         for index in self.indices:
             if index not in avoid:
-                a, b = self.triangle_lookup[index], self.triangle_lookup[~index]
+                a, b = self._triangle[index + self.zeta], self._triangle[~index + self.zeta]
                 if classes(a) != classes(b):
                     classes.union(a, b)
                     dual_tree.add(index)
@@ -360,18 +557,18 @@ class Triangulation:
         
         An edge is flippable if and only if it lies in two distinct triangles. '''
         
-        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        label = edge if isinstance(edge, curver.IntegerType) else edge.label  # If given an Edge instead.
         
-        return self.triangle_lookup[edge] != self.triangle_lookup[~edge]
+        return self._triangle[label + self.zeta] != self._triangle[~label + self.zeta]
     
     def square(self, edge):
         ''' Return the four edges around the given edge and the diagonal.
         
         The given edge must be flippable. '''
         
-        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        label = edge if isinstance(edge, curver.IntegerType) else edge.label  # If given an Edge instead.
         
-        assert self.is_flippable(edge)
+        assert self.is_flippable(label)
         
         # Given the e, return the edges a, b, c, d, e in order.
         #
@@ -389,17 +586,17 @@ class Triangulation:
         # V/    c     |
         # #---------->#
         
-        corner_A, corner_B = self.corner_lookup[edge], self.corner_lookup[~edge]
-        return [corner_A.edges[1], corner_A.edges[2], corner_B.edges[1], corner_B.edges[2], edge]
+        zeta = self.zeta
+        return [self.edges[self._next[label + zeta] + zeta], self.edges[self._prev[label + zeta] + zeta], self.edges[self._next[~label + zeta] + zeta], self.edges[self._prev[~label + zeta] + zeta], self.edges[label + zeta]]
     
     def all_encodings(self, num_flips):
         ''' Yield all encodings that can be made using at most the given number of flips.
         
-        Runs in exp(num_flips) time. '''
+        Runs in exp(num_flips) time. Most of these encodings end at the same triangulations
+        and so Triangulation.explore is usually a better choice. '''
         
         yield self.id_encoding()
         
-        # TODO: 3) Make efficient by using the fact that disjoint flips commute.
         if num_flips > 0:
             for edge in self.positive_edges:
                 if self.is_flippable(edge):
@@ -407,6 +604,139 @@ class Triangulation:
                     for encoding in step.target_triangulation.all_encodings(num_flips-1):
                         yield encoding * step
     
+    def explore(self, radius, up_to_isometry=False, key=None):
+        ''' Yield one shortest encoding from this triangulation to each triangulation within radius flips of it.
+        
+        The flip graph is explored breadth first and so encodings are yielded in order of length.
+        Triangulations are considered the same if they are equal or, if up_to_isometry is set,
+        if they are isometric. Alternatively, key can be a function taking an encoding to a
+        hashable object, in which case encodings are considered to reach the same triangulation
+        if and only if they have the same key. For example, taking the key to be the pullback of
+        encoding.target_triangulation.as_lamination() explores the flip graph of the surface
+        itself rather than its quotient by the mapping class group.
+        
+        Runs in exp(radius) time but each triangulation is only visited once. '''
+        
+        if key is None:
+            key = (lambda encoding: encoding.target_triangulation.iso_sig()) if up_to_isometry else (lambda encoding: encoding.target_triangulation)
+        
+        encoding = self.id_encoding()
+        seen = set([key(encoding)])
+        to_do = deque([(encoding, 0)])
+        while to_do:
+            encoding, distance = to_do.popleft()
+            yield encoding
+            
+            if distance < radius:
+                triangulation = encoding.target_triangulation
+                for edge in triangulation.positive_edges:
+                    if triangulation.is_flippable(edge):
+                        neighbour = triangulation.encode_flip(edge) * encoding
+                        neighbour_key = key(neighbour)
+                        if neighbour_key not in seen:
+                            seen.add(neighbour_key)
+                            to_do.append((neighbour, distance + 1))
+    
+    def _iso_code(self, start, best=None):
+        ''' Return the code of the component containing start found by relabelling it in the order it is met by a breadth first search from start.
+        
+        The search walks through the triangles, entering each at a corner, and records the new labels around
+        the triangle starting from this corner. Each edge is given the next new label the first time it is met,
+        with the orientation it is met in. This code determines the component up to relabelling and so two
+        components are isometric, via an isometry taking start to start', if and only if they have the same code.
+        
+        If best is given then this returns None as soon as it is clear that this code is larger than best. '''
+        
+        zeta = self.zeta
+        relabel = dict([(start, 0), (~start, ~0)])
+        visited = set([self._triangle[start + zeta]])
+        corners = [start]
+        code = []
+        smaller = best is None  # Whether code is already smaller than best.
+        for corner in corners:  # Note that corners grows as we go.
+            for label in [corner, self._next[corner + zeta], self._prev[corner + zeta]]:
+                if label not in relabel:
+                    relabel[label] = len(relabel) // 2
+                    relabel[~label] = ~relabel[label]
+                new_label = relabel[label]
+                if not smaller:
+                    if new_label > best[len(code)]:
+                        return None
+                    elif new_label < best[len(code)]:
+                        smaller = True
+                code.append(new_label)
+                
+                if self._triangle[~label + zeta] not in visited:
+                    visited.add(self._triangle[~label + zeta])
+                    corners.append(~label)
+        
+        return code
+    
+    @memoize
+    def _iso_codes(self):
+        ''' Return a list of pairs (code, starts), one for each component of this triangulation.
+        
+        Here code is the minimal _iso_code of the component and starts is the list of labels that achieve it.
+        We only try starting from the labels that minimise the pair of degrees of their vertices since this
+        choice is preserved by isometries. Hence, in a component, the number of such labels is the number of
+        its self-isometries. '''
+        
+        degrees = [len(self._vertices[vertex]) for vertex in self._vertex]  # Indexed by label + zeta.
+        key = lambda label: (degrees[label + self.zeta], degrees[~label + self.zeta])
+        
+        # Walk the tables to find the labels in each component. This is much faster than self.components().
+        zeta = self.zeta
+        seen = [False] * (2 * zeta)
+        iso_codes = []
+        for label in self.labels:
+            if seen[label + zeta]:
+                continue
+            
+            seen[label + zeta] = True
+            candidates = [label]
+            for current in candidates:  # Note that candidates grows as we go.
+                for neighbour in [~current, self._next[current + zeta]]:
+                    if not seen[neighbour + zeta]:
+                        seen[neighbour + zeta] = True
+                        candidates.append(neighbour)
+            
+            least = min(key(label) for label in candidates)
+            best, starts = None, []
+            for start in candidates:
+                if key(start) == least:
+                    code = self._iso_code(start, best)
+                    if code is not None:
+                        if code != best:
+                            best, starts = code, []
+                        starts.append(start)
+            iso_codes.append((best, starts))
+        
+        return iso_codes
+    
+    def iso_sig(self):
+        ''' Return the isomorphism signature of this triangulation.
+        
+        This is a string that does not depend on the labels of this triangulation.
+        Two triangulations are isometric if and only if they have the same isomorphism signature.
+        
+        The isomorphism signature of a connected triangulation is the signature of a canonical
+        relabelling of it and so this can be rebuilt via Triangulation.from_sig. For disconnected
+        triangulations, it is the sorted isomorphism signatures of its components, separated by '.'s. '''
+        
+        self.interned()  # So that equal triangulations share this (memoized) value.
+        return self._iso_sig()
+    
+    @memoize
+    def _iso_sig(self):
+        ''' Return the isomorphism signature of this triangulation, see iso_sig. '''
+        
+        sigs = []
+        for code, _ in self._iso_codes():
+            zeta = len(code) // 2
+            sigs.append(curver.kernel.utilities.b64encode(zeta) + '_' + curver.kernel.utilities.b64encode(curver.kernel.Permutation([x + zeta for x in code]).index()))
+        
+        return '.'.join(sorted(sigs))
+    
     def find_isometry(self, other, label_map):
         ''' Return the isometry from this triangulation to other defined by label_map.
         
@@ -420,10 +750,11 @@ class Triangulation:
         assert isinstance(label_map, dict)
         
         # Make a local copy as we may need to make a lot of changes.
-        label_map = dict(label_map)
+        # We also convert any Edges to their labels so that we can index directly into the tables.
+        label_map = dict((key.label if isinstance(key, Edge) else key, value.label if isinstance(value, Edge) else value) for key, value in label_map.items())
         
-        source_orders = dict((edge.label, len(vertex)) for vertex in self.vertices for edge in vertex)
-        target_orders = dict((edge.label, len(vertex)) for vertex in other.vertices for edge in vertex)
+        source_orders = [len(self._vertices[vertex]) for vertex in self._vertex]  # Indexed by label + zeta.
+        target_orders = [len(other._vertices[vertex]) for vertex in other._vertex]
         # We do a depth first search extending the corner map across the triangulation.
         # This is a stack of labels that may still have consequences to check.
         to_process = [(edge_from_label, label_map[edge_from_label]) for edge_from_label in label_map]
@@ -433,7 +764,7 @@ class Triangulation:
             
             neighbours = [
                 (~from_label, ~to_label),
-                (self.corner_lookup[from_label][1], other.corner_lookup[to_label][1])
+                (self._next[from_label + self.zeta], other._next[to_label + other.zeta])
                 ]
             for new_from_label, new_to_label in neighbours:
                 if new_from_label in label_map:
@@ -442,7 +773,7 @@ class Triangulation:
                         raise ValueError('This label_map does not extend to an isometry')
                 else:
                     # Extend the map.
-                    if source_orders[new_from_label] != target_orders[new_to_label]:
+                    if source_orders[new_from_label + self.zeta] != target_orders[new_to_label + other.zeta]:
                         raise ValueError('This label_map does not extend to an isometry')
                     label_map[new_from_label] = new_to_label
                     to_process.append((new_from_label, new_to_label))
@@ -450,11 +781,11 @@ class Triangulation:
         # Now assume that the map is the identity on all unmapped edges.
         # If we have gotten this far then the and unmapped edges must be entire components.
         used_labels = set(x for key_value in label_map.items() for x in key_value)
-        for edge in self.edges:
-            if edge.label not in used_labels:
-                if self.corner_lookup[edge] != other.corner_lookup[edge]:
+        for label in self.labels:
+            if label not in used_labels:
+                if self.zeta != other.zeta or self._next[label + self.zeta] != other._next[label + other.zeta]:
                     raise ValueError('This label_map does not extend to an isometry')
-                label_map[edge.label] = edge.label
+                label_map[label] = label
         
         # Check map is a bijection.
         if set(label_map.keys()) != set(self.labels):
@@ -466,32 +797,40 @@ class Triangulation:
         
         return curver.kernel.create.isometry(self, other, label_map)
     
-    def isometries_to(self, other):
-        ''' Return a list of all isometries from this triangulation to other. '''
+    def _isometries_to(self, other):
+        ''' Yield the isometries from this triangulation to other. '''
         
         assert isinstance(other, Triangulation)
         
-        if self.zeta != other.zeta:
-            return []
-        
-        if sorted(self.surface().values()) != sorted(other.surface().values()):
-            return []
-        
-        # TODO: 3) Make this more efficient by avoiding trying all mappings.
+        if self.zeta != other.zeta or self.iso_sig() != other.iso_sig():
+            return
         
-        # Isometries are determined by where a single triangle is sent.
-        sources = [min(component, key=lambda edge: len(self.vertex_lookup[edge])) for component in self.components()]
-        degrees = [len(self.vertex_lookup[edge]) for edge in sources]
-        targets = [[edge for edge in other.edges if len(other.vertex_lookup[edge]) == degree] for degree in degrees]
+        # Isometries are determined by where a single label in each component is sent. Since they preserve
+        # isomorphism signatures, we may as well send a minimal start of each component to a minimal start
+        # of a component of other with the same code.
+        sources = [starts[0] for _, starts in self._iso_codes()]
+        targets = [[target for other_code, other_starts in other._iso_codes() if other_code == code for target in other_starts] for code, _ in self._iso_codes()]
         
-        isometries = []
         for chosen_targets in product(*targets):
             try:
-                isometries.append(self.find_isometry(other, dict(zip(sources, chosen_targets))))
-            except ValueError:  # Map does not extend uniquely.
+                yield self.find_isometry(other, dict(zip(sources, chosen_targets)))
+            except ValueError:  # Map is not injective.
                 pass
+    
+    def isometries_to(self, other):
+        ''' Return a list of all isometries from this triangulation to other. '''
         
-        return isometries
+        return list(self._isometries_to(other))
+    
+    def first_isometry_to(self, other):
+        ''' Return an isometry from this triangulation to other.
+        
+        This stops as soon as the first isometry is found and raises a ValueError if there are none. '''
+        
+        for isometry in self._isometries_to(other):
+            return isometry
+        
+        raise ValueError('%s is not isometric to %s' % (self, other))
     
     def self_isometries(self):
         ''' Return a list of isometries taking this triangulation to itself. '''
@@ -503,7 +842,7 @@ class Triangulation:
         
         assert isinstance(other, Triangulation)
         
-        return len(self.isometries_to(other)) > 0
+        return self.zeta == other.zeta and self.iso_sig() == other.iso_sig()
     
     # Laminations we can build on this triangulation.
     def lamination(self, weights, promote=True):
@@ -687,8 +1026,11 @@ class Triangulation:
         
         The given edge must be flippable. '''
         
-        move = self.encode_multiflip([edge])
-        return curver.kernel.create.edgeflip(move.source_triangulation, move.target_triangulation, edge).encode()
+        if isinstance(edge, curver.IntegerType): edge = curver.kernel.Edge(edge)  # If given an integer instead.
+        
+        assert self.is_flippable(edge)
+        
+        return curver.kernel.create.edgeflip(self, self._flipped([edge]), edge).encode()
     
     def encode_multiflip(self, edges):
         ''' Return an encoding of the effect of flipping the given edges.
@@ -716,23 +1058,7 @@ class Triangulation:
         # V/    c     |     |          V|
         # #---------->#     #-----------#
         
-        edge_map = dict((edge, Edge(edge.label)) for edge in self.edges)
-        
-        # Most triangles don't change.
-        triangles = [Triangle([edge_map[edgy] for edgy in triangle]) for triangle in self if triangle not in support]
-        
-        for edge in edges:
-            a, b, c, d, e = self.square(edge)
-            
-            if edge.sign() == +1:
-                triangle_A2 = Triangle([edge_map[e], edge_map[d], edge_map[a]])
-                triangle_B2 = Triangle([edge_map[~e], edge_map[b], edge_map[c]])
-            else:  # edge.sign() == -1:
-                triangle_A2 = Triangle([edge_map[~e], edge_map[d], edge_map[a]])
-                triangle_B2 = Triangle([edge_map[e], edge_map[b], edge_map[c]])
-            triangles.extend([triangle_A2, triangle_B2])
-        
-        new_triangulation = Triangulation(triangles)
+        new_triangulation = self._flipped(edges)
         return curver.kernel.create.multiedgeflip(self, new_triangulation, edges).encode()
     
     def encode_relabel_edges(self, label_map):
@@ -758,7 +1084,7 @@ class Triangulation:
                 raise ValueError('Missing new label for %d' % i)
         
         edge_map = dict((edge, Edge(label_map[edge.label])) for edge in self.edges)
-        new_triangulation = Triangulation([Triangle([edge_map[edge] for edge in triangle]) for triangle in self])
+        new_triangulation = Triangulation([Triangle([edge_map[edge] for edge in triangle]) for triangle in self]).interned()
         
         return curver.kernel.create.isometry(self, new_triangulation, label_map).encode()
     
@@ -789,7 +1115,7 @@ class Triangulation:
             else:
                 new_triangles.append(curver.kernel.Triangle([a, b, c]))
         
-        new_triangulation = curver.kernel.Triangulation(new_triangles)
+        new_triangulation = curver.kernel.Triangulation(new_triangles).interned()
         matrix = np.stack(matrix_rows)
         inverse_matrix = np.array([[curver.kernel.utilities.half if i == j else 0 for i in range(zeta)] for j in range(self.zeta)], dtype=object)
         
@@ -1,6 +1,8 @@
 
 ''' A module for representing more advanced ways of changing triangulations. '''
 
+from math import floor
+
 import curver
 from curver.kernel.moves import FlipGraphMove  # Special import needed for subclassing.
 
@@ -54,6 +56,18 @@ class Twist(FlipGraphMove):
         if intersection == 0:  # Disjoint twists have no effect.
             return lamination
         
+        def shift(lamination, k):
+            return lamination.__class__(self.target_triangulation, [w + k * intersection * c for w, c in zip(lamination, self.curve)])  # Avoids promote.
+        
+        return self._accelerated(lamination, self.curve.slope(lamination), shift)
+    
+    def _accelerated(self, lamination, slope, shift):
+        ''' Return the image of lamination under this twist, given its slope about self.curve.
+        
+        shift(lamination, k) must return lamination with k times its intersection with self.curve copies of self.curve added
+        (or removed when k < 0). Away from the dangerous region -1 < slope < 1 this is the effect of k twists and so this
+        works for any type of lamination whose slope can be computed. '''
+        
         # Naive way would be to do:
         # return self.encoding(lamination, power=self.power)
         # which is roughly equivalent to:
@@ -63,13 +77,12 @@ class Twist(FlipGraphMove):
         # But we can be cleverer and perform this calculation in O(log(self.power)) instead.
         
         power = self.power
-        slope = self.curve.slope(lamination)
         # Only one of the following two blocks will run:
         
         # Right twist block (increases slope).
         if power > 0 and slope <= -1:
-            steps = min(power, -slope.numerator // slope.denominator)  # floor(-slope).
-            lamination = lamination.__class__(self.target_triangulation, [w - steps * intersection * c for w, c in zip(lamination, self.curve)])  # Avoids promote.
+            steps = min(power, floor(-slope))
+            lamination = shift(lamination, -steps)
             power = power - steps
         
         # We have to go slowly through the dangerous region.
@@ -79,12 +92,12 @@ class Twist(FlipGraphMove):
             power = power - min(power, 3)
         
         if power > 0:  # Since we now have self.curve.slope(lamination) > 0 we can accelerate.
-            lamination = lamination.__class__(self.target_triangulation, [w + power * intersection * c for w, c in zip(lamination, self.curve)])  # Avoids promote.
+            lamination = shift(lamination, power)
         
         # Left twist block (decreases slope).
         if power < 0 and slope >= 1:
-            steps = min(-power, slope.numerator // slope.denominator)  # floor(slope).
-            lamination = lamination.__class__(self.target_triangulation, [w - steps * intersection * c for w, c in zip(lamination, self.curve)])  # Avoids promote.
+            steps = min(-power, floor(slope))
+            lamination = shift(lamination, -steps)
             power = power + steps
         
         # We have to go slowly through the dangerous region.
@@ -94,10 +107,48 @@ class Twist(FlipGraphMove):
             power = power - max(power, -3)
         
         if power < 0:  # Since we now have self.curve.slope(lamination) < 0 we can accelerate.
-            lamination = lamination.__class__(self.target_triangulation, [w + -power * intersection * c for w, c in zip(lamination, self.curve)])  # Avoids promote.
+            lamination = shift(lamination, -power)
         
         return lamination
     
+    def apply_lamination_batch(self, batch):
+        if self.power == 1:
+            return self.encoding(batch)
+        if self.power == -1:
+            return self.encoding.inverse()(batch)
+        
+        # Otherwise the acceleration in apply_lamination depends on the slope of each lamination, so map them one at a time.
+        return super().apply_lamination_batch(batch)
+    
+    def instructions(self):
+        # The acceleration in apply_lamination depends on the lamination, so only the easy cases can be lowered to flips.
+        if self.power == 1:
+            return [instruction for item in reversed(self.encoding) for instruction in item.instructions()]
+        if self.power == -1:
+            return [instruction for item in reversed(self.encoding.inverse()) for instruction in item.instructions()]
+        
+        return super().instructions()
+    
+    def apply_projective(self, lamination):
+        # Take care of some easy cases for speed.
+        if self.power == 1:
+            return self.encoding(lamination)
+        if self.power == -1:
+            return self.encoding.inverse()(lamination)
+        
+        # Twisting is homogeneous so we can accelerate using the normalised weights, viewed as a (real) Lamination.
+        def intersection(lamination):
+            return self.curve.intersection(curver.kernel.Lamination(lamination.triangulation, list(lamination)))
+        
+        if intersection(lamination) <= curver.kernel.projective.TOLERANCE:  # Disjoint, up to rounding, twists have no effect.
+            return lamination
+        
+        def shift(lamination, k):
+            scale = k * intersection(lamination)  # The weights may have been renormalised since the start.
+            return curver.kernel.ProjectiveLamination(self.target_triangulation, [w + scale * c for w, c in zip(lamination, self.curve)], lamination.log_scale)
+        
+        return self._accelerated(lamination, self.curve.slope(curver.kernel.Lamination(lamination.triangulation, list(lamination))), shift)
+    
     def apply_homology(self, homology_class):
         a = self.curve.parallel()
         
@@ -112,6 +163,13 @@ class Twist(FlipGraphMove):
     def inverse(self):
         return Twist(self.curve, -self.power)
     
+    def combine(self, other):
+        if isinstance(other, Twist) and other.curve == self.curve:  # Twists about the same curve commute so their powers add.
+            power = self.power + other.power
+            return [Twist(self.curve, power)] if power else []
+        
+        return None
+    
     def flip_mapping(self):
         return self.encoding**self.power
 
@@ -182,11 +240,27 @@ class HalfTwist(FlipGraphMove):
     def apply_lamination(self, lamination):
         return self.encoding_power(lamination)
     
+    def apply_lamination_batch(self, batch):
+        return self.encoding_power(batch)
+    
+    def apply_projective(self, lamination):
+        return self.encoding_power(lamination)
+    
     def apply_homology(self, homology_class):
         return self.encoding_power(homology_class)
     
+    def instructions(self):
+        return [instruction for item in reversed(self.encoding_power) for instruction in item.instructions()]
+    
     def inverse(self):
         return HalfTwist(self.arc, -self.power)
     
+    def combine(self, other):
+        if isinstance(other, HalfTwist) and other.arc == self.arc:
+            power = self.power + other.power
+            return [HalfTwist(self.arc, power)] if power else []
+        
+        return None
+    
     def flip_mapping(self):
         return self.encoding**self.power
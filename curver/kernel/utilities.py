@@ -1,7 +1,7 @@
 
 ''' A module of useful, generic functions; including input and output formatting. '''
 
-from itertools import product
+from itertools import groupby, product
 from string import ascii_lowercase, ascii_uppercase, digits
 import re
 
@@ -12,16 +12,14 @@ ALPHABET = digits + ascii_lowercase + ascii_uppercase + '+-'
 def b64encode(n):
     ''' Return n in base 64. '''
     
-    out = []
-    while n:
-        n, r = divmod(n, 64)
-        out.append(ALPHABET[r])
-    return ''.join(out)
+    # Since 64 = 2**6 each digit is just a block of six bits, which avoids repeatedly dividing a large n.
+    bits = bin(n)[2:] if n else ''
+    return ''.join(ALPHABET[int(bits[max(i-6, 0):i], 2)] for i in range(len(bits), 0, -6))
 
 def b64decode(strn):
     ''' Return the integer with base 64 encoding strn. '''
     
-    return sum(ALPHABET.index(c) * 64**i for i, c in enumerate(strn))
+    return int(''.join(format(ALPHABET.index(c), '06b') for c in reversed(strn)), 2) if strn else 0
 
 def string_generator(n, skip=None):
     ''' Return a list of n usable names, none of which are in skip. '''
@@ -86,6 +84,65 @@ def maximum(iterable, key=lambda x: x, upper_bound=None):
 
     return max(helper(), key=key)
 
+def canonical_form(cells, matrix, markings, preserves_markings):
+    ''' Return the lexicographically least pair (L, M) over all permutations perm of range(len(matrix)) that map each cell to itself.
+    
+    Here L is the upper triangle, read row by row, of the symmetric matrix after reordering its rows and columns by perm and M is markings(perm).
+    The cells must be consecutive blocks of indices.
+    
+    Rather than trying every such permutation this is built one index at a time. After placing an index the later cells are refined
+    by its row, in increasing order, since the permutations that give the least L are exactly the ones that can be built in this way.
+    When an index has to be chosen from a cell that is still tied, each choice is tried except those that are the image of one already
+    tried under a known automorphism fixing the indices placed so far. Automorphisms are found when two permutations give the same pair
+    and are only used if preserves_markings(automorphism) is True. '''
+    
+    best = []  # The best (L, M) found so far and a permutation that achieves it.
+    automorphisms = []
+    
+    def search(perm, cells, L):
+        ''' Extend perm using the (ordered) cells, where L is the part of the upper triangle that perm determines. '''
+        
+        if not cells:
+            key = (L, markings(perm))
+            if not best or key < best[0]:
+                best[:] = [key, perm]
+            elif key == best[0]:
+                automorphism = [None] * len(perm)
+                for i, j in zip(best[1], perm):
+                    automorphism[i] = j
+                if preserves_markings(automorphism):
+                    automorphisms.append(automorphism)
+            return
+        
+        first, rest = cells[0], cells[1:]
+        tried = set()
+        for index in first:
+            if index in tried:
+                continue
+            
+            row = matrix[index]
+            refined = []
+            for cell in [[i for i in first if i != index]] + rest:
+                refined.extend(list(g) for _, g in groupby(sorted(cell, key=row.__getitem__), key=row.__getitem__))
+            new_L = L + [row[index]] + [row[i] for cell in refined for i in cell]
+            if not best or new_L <= best[0][0][:len(new_L)]:  # Otherwise this cannot beat the best.
+                search(perm + [index], refined, new_L)
+            
+            # Mark the orbit of index under the automorphisms that fix perm as tried.
+            stabiliser = [automorphism for automorphism in automorphisms if all(automorphism[i] == i for i in perm)]
+            to_do = [index]
+            tried.add(index)
+            while to_do:
+                current = to_do.pop()
+                for automorphism in stabiliser:
+                    if automorphism[current] not in tried:
+                        tried.add(automorphism[current])
+                        to_do.append(automorphism[current])
+    
+    search([], [list(cell) for cell in cells], [])
+    
+    return best[0]
+
 def alphanum_key(strn):
     ''' Return a list of string and number chunks from a string. '''
     
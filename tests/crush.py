@@ -7,6 +7,7 @@ from hypothesis import given, settings
 import hypothesis.strategies as st
 import pytest
 
+import curver
 import strategies
 
 class TestCrush(unittest.TestCase):
@@ -32,6 +33,32 @@ class TestCrush(unittest.TestCase):
         lifted_peripherals = [lift(lift.source_triangulation.curve_from_cut_sequence(vertex)) for vertex in lift.source_triangulation.vertices]
         self.assertEqual(Counter(lifted_peripherals), Counter(peripheral_curves + ([] if curve.is_peripheral() else [curve, curve])))
     
+    @given(st.data())
+    @settings(max_examples=10)
+    def test_batch(self, data):
+        curve = data.draw(strategies.curves())
+        laminations = data.draw(st.lists(elements=strategies.laminations(curve.triangulation), max_size=5))
+        crush = curve.crush()
+        batch = crush(curver.kernel.LaminationBatch.from_laminations(curve.triangulation, laminations))
+        self.assertEqual(batch.laminations(), [crush(lamination) for lamination in laminations])
+        
+        lift = crush.inverse()
+        peripherals = [lift.source_triangulation.curve_from_cut_sequence(vertex) for vertex in lift.source_triangulation.vertices]
+        batch = lift(curver.kernel.LaminationBatch.from_laminations(lift.source_triangulation, peripherals))
+        self.assertEqual(batch.laminations(), [lift(peripheral) for peripheral in peripherals])
+    
+    @given(st.data())
+    @settings(max_examples=10)
+    def test_transport(self, data):
+        curve = data.draw(strategies.curves())
+        lamination = data.draw(strategies.laminations(curve.triangulation))
+        lamination = lamination + curve
+        lamination.components()
+        crush = curve.crush()
+        image = crush(lamination, transport=True)
+        self.assertEqual(image.components(), crush(lamination).components())
+        self.assertEqual(image, crush(lamination))
+    
     @given(st.data())
     @settings(max_examples=20)
     def test_twist(self, data):
@@ -6,6 +6,7 @@ from hypothesis import given, settings
 import hypothesis.strategies as st
 import numpy as np
 
+import curver
 import strategies
 
 class TestEncoding(unittest.TestCase):
@@ -40,6 +41,116 @@ class TestEncoding(unittest.TestCase):
     def test_package(self, data):
         h = data.draw(self._strategy())
         self.assertEqual(h, h.source_triangulation.encode(h.package()))
+    
+    def draw_laminations(self, data, h):
+        return data.draw(st.lists(elements=strategies.laminations(h.source_triangulation), min_size=1, max_size=5))
+    
+    def assertActsLike(self, f, h, laminations):
+        ''' Check that f maps each of the laminations, and a batch of all of them, to the same place that h does. '''
+        images = [h(lamination) for lamination in laminations]
+        self.assertEqual([f(lamination) for lamination in laminations], images)
+        batch = curver.kernel.LaminationBatch.from_laminations(h.source_triangulation, laminations)
+        self.assertEqual(f(batch).laminations(), images)
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_batch(self, data):
+        h = data.draw(self._strategy())
+        self.assertActsLike(h, h, self.draw_laminations(data, h))
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_batch_large(self, data):
+        h = data.draw(self._strategy())
+        laminations = data.draw(st.lists(elements=strategies.multicurves(h.source_triangulation), min_size=1, max_size=5))
+        laminations = [data.draw(st.integers(min_value=1, max_value=2**62)) * lamination for lamination in laminations]  # Near where int64s overflow.
+        self.assertActsLike(h, h, laminations)
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_batch_safe(self, data):
+        h = data.draw(self._strategy())
+        lamination = data.draw(strategies.multicurves(h.source_triangulation))
+        # Scale so that the largest weight is just below, at or just above where batches switch from int64s to objects.
+        scale = curver.kernel.batch.SAFE // max(abs(weight) for weight in lamination) + data.draw(st.integers(min_value=-1, max_value=1))
+        self.assertActsLike(h, h, [scale * lamination, lamination])
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_compile(self, data):
+        h = data.draw(self._strategy())
+        laminations = self.draw_laminations(data, h)
+        compiled = h.compile()
+        h = h.__class__(h.sequence)  # An uncompiled copy.
+        self.assertActsLike(compiled, h, laminations)
+        for lamination in laminations:
+            self.assertIs(type(compiled(lamination)), type(h(lamination)))
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_compact(self, data):
+        h = data.draw(self._strategy())
+        laminations = self.draw_laminations(data, h)
+        window = data.draw(st.integers(min_value=1, max_value=4))
+        compact = h.compact(window)
+        self.assertEqual(len(compact), len(h))
+        self.assertEqual(list(compact), list(h))
+        self.assertEqual(compact.expand(), h)
+        self.assertEqual(compact.inverse().expand(), h.inverse())
+        self.assertEqual(pickle.loads(pickle.dumps(compact)).expand(), h)
+        self.assertActsLike(compact, h, laminations)
+        if h.source_triangulation == h.target_triangulation:
+            self.assertEqual((compact**3).expand(), h**3)
+        layered = h.layer().compact(window)
+        self.assertEqual(layered.expand(), h)
+        for tag, data in list(compact.others.values()) + list(layered.others.values()):
+            self.assertTrue(tag != curver.kernel.compact.MOVE or not isinstance(data, (curver.kernel.Isometry, curver.kernel.EdgeFlip, curver.kernel.MultiEdgeFlip, curver.kernel.Twist, curver.kernel.HalfTwist)))
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_compact_windows(self, data):
+        h = data.draw(self._strategy())
+        window = data.draw(st.sampled_from([len(h) - 1, len(h), len(h) + 1]).filter(lambda window: window >= 1))  # Around a single window.
+        compact = h.compact(window)
+        self.assertEqual(compact.starts[0], 0)
+        self.assertEqual(compact.starts[-1], len(h))
+        self.assertTrue(all(end - start >= window for start, end in zip(compact.starts, compact.starts[1:])) or len(compact.starts) == 2)
+        moves = list(h)
+        for index in range(-len(h), len(h)):  # Including either side of each boundary.
+            self.assertEqual(compact[index], moves[index])
+        with self.assertRaises(IndexError):
+            compact[len(h)]  # pylint: disable=pointless-statement
+        joined = curver.kernel.CompactEncoding.concatenate([compact, h.source_triangulation.id_encoding().compact(window)])
+        self.assertEqual(joined.expand(), h)
+    
+    @given(st.data())
+    @settings(max_examples=10)
+    def test_huge_powers(self, data):
+        h = data.draw(self._strategy(power_range=2**70))  # Twist powers that do not fit in an int64.
+        laminations = self.draw_laminations(data, h)
+        window = data.draw(st.integers(min_value=1, max_value=4))
+        compiled = h.__class__(h.sequence).compile()
+        self.assertActsLike(compiled, h, laminations)
+        self.assertActsLike(h.compact(window), h, laminations)
+        self.assertActsLike(h.layer(), h, laminations)
+        self.assertActsLike(h.reduce(), h, laminations)
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_reduce(self, data):
+        h = data.draw(self._strategy())
+        reduced = h.reduce()
+        self.assertEqual(reduced, h)
+        self.assertLessEqual(len(reduced), len(h))
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_layer(self, data):
+        h = data.draw(self._strategy())
+        layered = h.layer()
+        self.assertEqual(layered, h)
+        self.assertLessEqual(len(layered), len(h))
+        self.assertActsLike(layered, h, self.draw_laminations(data, h))
 
 class TestMapping(TestEncoding):
     _strategy = staticmethod(strategies.mappings)
@@ -63,6 +174,18 @@ class TestMapping(TestEncoding):
         self.assertEqual(~(~g), g)
         self.assertEqual(~g * ~h, ~(h * g))
     
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_reduce_product(self, data):
+        g = data.draw(self._strategy())
+        h = data.draw(self._strategy(g.target_triangulation))
+        self.assertEqual(len(curver.kernel.encoding.reduced_product(g.sequence, (~g).sequence)), 0)
+        self.assertEqual(len(curver.kernel.encoding.reduced_product(g.sequence, (~g).sequence, reduce=False)), len(g) + len(~g))
+        self.assertLessEqual(len((h * g * ~g).reduce()), len(h))
+        product = (h * g).reduce(~g)
+        self.assertEqual(product, h * g * ~g)
+        self.assertLessEqual(len(product), len(h))
+    
     @given(st.data())
     def test_simplify(self, data):
         h = data.draw(self._strategy())
@@ -79,6 +202,18 @@ class TestMapping(TestEncoding):
     def test_flip_mapping(self, data):
         h = data.draw(self._strategy())
         self.assertEqual(h, h.flip_mapping())
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_transport(self, data):
+        h = data.draw(self._strategy())
+        lamination = data.draw(strategies.laminations(h.source_triangulation))
+        lamination.components()
+        image = h(lamination, transport=True)
+        self.assertEqual(image.components(), h(lamination).components())
+        short, conjugator = image.shorten()
+        self.assertTrue(short.is_short())
+        self.assertEqual(conjugator(image), short)
 
 class TestMappingClass(TestMapping):
     _strategy = staticmethod(strategies.mapping_classes)
@@ -97,6 +232,20 @@ class TestMappingClass(TestMapping):
         i = data.draw(st.integers(min_value=-10, max_value=10))
         self.assertEqual(h(c, power=i), (h**i)(c))
     
+    @given(st.data())
+    @settings(max_examples=10)
+    def test_compact_huge_twist(self, data):
+        triangulation = data.draw(strategies.triangulations())
+        curve = data.draw(strategies.curves(triangulation))
+        other = data.draw(strategies.curves(triangulation))
+        power = data.draw(st.integers(min_value=2**63, max_value=2**100)) * data.draw(st.sampled_from([-1, 1]))  # Too large for an int64.
+        h = curve.encode_twist(power)
+        compact = h.compact(1)
+        self.assertEqual(compact.expand(), h)
+        self.assertEqual(compact(other), h(other))
+        _, conjugator = h(other).shorten()  # This twists back by a huge power when other meets curve.
+        self.assertEqual(conjugator.compact().expand(), conjugator)
+    
     @given(st.data())
     @settings(max_examples=2)
     def test_order(self, data):
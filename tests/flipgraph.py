@@ -0,0 +1,68 @@
+
+import os
+import tempfile
+import unittest
+
+from hypothesis import given, settings
+import hypothesis.strategies as st
+
+import curver
+
+class TestModularFlipGraph(unittest.TestCase):
+    @given(st.sampled_from([(0, 3, 2), (0, 4, 6), (1, 1, 1), (1, 2, 5), (2, 1, 9)]))
+    @settings(max_examples=5)
+    def test_size(self, surface):
+        g, p, size = surface
+        G = curver.kernel.ModularFlipGraph(curver.load(g, p).triangulation)
+        self.assertTrue(G.build())
+        self.assertEqual(len(G), size)
+        self.assertEqual(len(G.graph()), size)
+    
+    @given(st.sampled_from([(0, 4), (1, 2), (2, 1)]))
+    @settings(max_examples=3)
+    def test_flips(self, surface):
+        T = curver.load(*surface).triangulation
+        G = curver.kernel.ModularFlipGraph(T)
+        G.build()
+        for sig in G:
+            for label, target in G.neighbours(sig):
+                self.assertEqual(G.encode_flip(sig, label).target_triangulation, G.representative(target))
+        
+        for encoding in T.explore(1):
+            sig, isometry = G.canonical(encoding.target_triangulation)
+            self.assertIn(sig, G)
+            self.assertEqual(isometry.target_triangulation, G.representative(sig))
+    
+    def test_resume(self):
+        T = curver.load(1, 2).triangulation
+        complete = curver.kernel.ModularFlipGraph(T)
+        complete.build()
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'S_1_2.txt')
+            G = curver.kernel.ModularFlipGraph(T, path)
+            self.assertFalse(G.build(max_vertices=2))
+            
+            G = curver.kernel.ModularFlipGraph(T, path)  # Resume.
+            self.assertEqual(len(G.edges), 2)
+            self.assertTrue(G.build())
+            self.assertEqual(G.sigs, complete.sigs)
+            self.assertEqual(G.edges, complete.edges)
+            
+            G = curver.kernel.ModularFlipGraph(T, path)  # Reload.
+            self.assertTrue(G.is_complete())
+            self.assertEqual(G.edges, complete.edges)
+            
+            # Cut the file part way through its last line, as if the enumeration was interrupted while writing.
+            with open(path, 'r+b') as disk:
+                disk.truncate(os.path.getsize(path) - 3)
+            G = curver.kernel.ModularFlipGraph(T, path)  # Resume.
+            self.assertFalse(G.is_complete())
+            self.assertTrue(G.build())
+            self.assertEqual(G.edges, complete.edges)
+            G = curver.kernel.ModularFlipGraph(T, path)  # Reload.
+            self.assertTrue(G.is_complete())
+            self.assertEqual(G.edges, complete.edges)
+            
+            with self.assertRaises(ValueError):
+                curver.kernel.ModularFlipGraph(curver.load(2, 1).triangulation, path)
@@ -5,6 +5,7 @@ import unittest
 from hypothesis import given, settings
 import hypothesis.strategies as st
 
+import curver
 from base_classes import TopologicalInvariant
 import strategies
 
@@ -60,9 +61,60 @@ class TestLamination(TopologicalInvariant, unittest.TestCase):
         self.assertEqual(lamination1.intersection(lamination2), lamination2.intersection(lamination1))
         self.assertEqual(lamination1.intersection(lamination2), h(lamination1).intersection(h(lamination2)))
     
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_kind(self, data):
+        lamination = data.draw(self._strategy())
+        promoted = lamination.triangulation(list(lamination))
+        self.assertEqual(promoted, lamination)
+        self.assertIsInstance(promoted, lamination.kind())  # Resolves promoted.
+        self.assertIs(type(promoted), lamination.kind())
+        self.assertEqual(promoted.kind(), lamination.kind())
+    
+    @given(st.data())
+    def test_unresolved_repr(self, data):
+        lamination = data.draw(self._strategy())
+        kind = lamination.kind()
+        name = '[' + ', '.join(str(weight) for weight in lamination) + ']'
+        self.assertEqual(str(lamination.triangulation(list(lamination))), '%s %s on %s' % (kind.__name__, name, lamination.triangulation))
+        self.assertEqual(repr(lamination.triangulation(list(lamination))), '%s(%r, %r)' % (kind.__name__, lamination.triangulation, list(lamination)))
+        self.assertIs(type(pickle.loads(pickle.dumps(lamination.triangulation(list(lamination))))), kind)
+    
+    def test_walkthrough_str(self):
+        S = curver.load(1, 2)  # As in docs/user/walkthrough.rst.
+        self.assertEqual(str(S.lamination([1, 0, 1, 0, 0, 0])), 'Curve [1, 0, 1, 0, 0, 0] on 6_WKSv')
+        self.assertEqual(str(S.lamination([0, 0, 1, 0, 0, 0])), 'Arc [0, 0, 1, 0, 0, 0] on 6_WKSv')
+        self.assertEqual(str(S.lamination([0, 0, -1, 0, 0, 1])), 'MultiArc [0, 0, -1, 0, 0, 1] on 6_WKSv')
+        self.assertTrue(str(S.arcs['s_1'].boundary()).startswith('Curve '))
+    
     @given(st.data())
     @settings(max_examples=20)
     def test_boundary_intersection(self, data):
         lamination = data.draw(self._strategy())
         self.assertEqual(lamination.intersection(lamination.boundary()), 0)
+    
+    @given(st.data())
+    @settings(max_examples=10)
+    def test_intersection_matrix(self, data):
+        lamination = data.draw(self._strategy())
+        laminations = [lamination] + data.draw(st.lists(self._strategy(lamination.triangulation), min_size=1, max_size=3))
+        M = curver.kernel.intersection_matrix(laminations)
+        for i, lamination1 in enumerate(laminations):
+            for j, lamination2 in enumerate(laminations):
+                self.assertEqual(M[i, j], lamination1.intersection(lamination2))
+        self.assertEqual(lamination.intersections(laminations * 8), list(M[0]) * 8)  # Large enough to map as a batch.
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_workspace(self, data):
+        lamination = data.draw(self._strategy())
+        h = data.draw(strategies.mappings(lamination.triangulation))
+        workspace = curver.kernel.lamination.LaminationWorkspace(lamination)
+        for move in reversed(h.sequence):
+            workspace.apply(move.encode())
+        image = h(lamination)
+        self.assertEqual(workspace.lamination(), image)
+        self.assertEqual(workspace.weight, image.weight())
+        self.assertEqual([workspace.dual_weight(edge.label) for edge in image.triangulation.edges], [image.dual_weight(edge) for edge in image.triangulation.edges])
+        self.assertEqual([workspace.left_weight(edge.label) for edge in image.triangulation.edges], [image.left_weight(edge) for edge in image.triangulation.edges])
 
@@ -1,4 +1,5 @@
 
+from itertools import permutations
 import pickle
 import unittest
 
@@ -29,6 +30,11 @@ class TestPermutation(unittest.TestCase):
     def test_from_index(self, perm):
         self.assertEqual(perm, curver.kernel.Permutation.from_index(len(perm), perm.index()))
     
+    @given(st.integers(min_value=0, max_value=5))
+    def test_index(self, N):
+        for index, perm in enumerate(permutations(range(N))):  # These are generated in lexicographic order.
+            self.assertEqual(curver.kernel.Permutation(list(perm)).index(), index)
+    
     @given(strategies.permutations())
     def test_equal(self, perm):
         self.assertEqual(perm, perm)
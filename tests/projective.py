@@ -0,0 +1,56 @@
+
+import unittest
+from math import log
+
+from hypothesis import given, settings
+import hypothesis.strategies as st
+
+import curver
+import strategies
+
+class TestProjectiveLamination(unittest.TestCase):
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_image(self, data):
+        h = data.draw(strategies.mappings())
+        lamination = data.draw(strategies.laminations(h.source_triangulation))
+        image = h(curver.kernel.ProjectiveLamination.from_lamination(lamination))
+        self.assertTrue(image.is_close(h(lamination)))
+        self.assertAlmostEqual(image.log_scale, log(max(abs(weight) for weight in h(lamination))))
+    
+    @given(st.data())
+    @settings(max_examples=10)
+    def test_power(self, data):
+        h = data.draw(strategies.mapping_classes(power_range=3))
+        curve = data.draw(strategies.curves(h.source_triangulation))
+        power = data.draw(st.integers(min_value=-10, max_value=10))
+        image = h(curver.kernel.ProjectiveLamination.from_lamination(curve), power=power)
+        self.assertTrue(image.is_close(h(curve, power=power), tolerance=1e-6))
+        self.assertAlmostEqual(image.log_scale, log(max(h(curve, power=power))))
+    
+    @given(st.data())
+    @settings(max_examples=20)
+    def test_twist(self, data):
+        triangulation = data.draw(strategies.triangulations())
+        curve = data.draw(strategies.curves(triangulation))
+        lamination = data.draw(strategies.laminations(triangulation))
+        power = data.draw(st.integers(min_value=-1000, max_value=1000).filter(lambda p: p != 0))
+        h = curve.encode_twist(power)
+        image = h(curver.kernel.ProjectiveLamination.from_lamination(lamination))
+        self.assertTrue(image.is_close(h(lamination), tolerance=1e-6))
+        if any(lamination):
+            self.assertAlmostEqual(image.log_scale, log(max(abs(weight) for weight in h(lamination))))
+        if abs(power) <= 10:  # Compare against twisting one step at a time.
+            twist = curve.encode_twist(1 if power > 0 else -1)
+            stepwise = curver.kernel.ProjectiveLamination.from_lamination(lamination)
+            for _ in range(abs(power)):
+                stepwise = twist(stepwise)
+            self.assertTrue(image.is_close(stepwise, tolerance=1e-6))
+    
+    def test_twist_disjoint(self):
+        S = curver.load(2, 2)
+        lamination = 3 * S.curves['c_0'] + S('a_0')(S.curves['c_0'])  # Its normalised weights meet a_1 only up to rounding.
+        h = S.curves['a_1'].encode_twist(10**20)
+        image = h(curver.kernel.ProjectiveLamination.from_lamination(lamination))
+        self.assertTrue(image.is_close(h(lamination)))
+        self.assertAlmostEqual(image.log_scale, log(max(h(lamination))))
@@ -40,4 +40,13 @@ class TestRegression(unittest.TestCase):
         x = b + T.edge_arc(11)
         y = b + T.edge_arc(13)
         self.assertNotEqual(x.topological_type(), y.topological_type())
-
+    
+    def test_multiarc_topological_type_unchanged(self):
+        # The value computed by the original implementation, which tries every ordering of the nodes.
+        S = curver.load(0, 5)
+        a = S.triangulation([0, 0, -1, 0, 1, 0, 0, 0, 0])
+        self.assertEqual(tuple(a.topological_type()), (
+            [-1, 0, 0, 0],
+            [[], [0], [0, 0], [0, 0], [], [0], [0], [], [], []],
+            [[], [(0, -1), (0, -1), (-1, 2), (-1, 2)], [], [(0, -1), (0, -1), (-1, 2), (-1, 2)]],
+            ))
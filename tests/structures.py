@@ -39,6 +39,103 @@ class UnionFindRules(RuleBasedStateMachine):
 
 TestUnionFind = UnionFindRules.TestCase
 
+class IntegerUnionFindRules(RuleBasedStateMachine):
+    def __init__(self):
+        super(IntegerUnionFindRules, self).__init__()
+        self.initialize(1)
+    
+    @rule(n=st.integers(min_value=1, max_value=100))
+    def initialize(self, n):
+        self.__n = n
+        self.__union_find = curver.kernel.IntegerUnionFind(n)
+        self.__reference = curver.kernel.UnionFind(range(n))
+    
+    @rule(data=st.data())
+    def union2(self, data):
+        a = data.draw(st.integers(min_value=0, max_value=self.__n-1))
+        b = data.draw(st.integers(min_value=0, max_value=self.__n-1))
+        self.__union_find.union2(a, b)
+        self.__reference.union2(a, b)
+        assert self.__union_find(a) == self.__union_find(b)
+    
+    @rule(data=st.data())
+    def union_pairs(self, data):
+        pairs = data.draw(st.lists(elements=st.tuples(st.integers(min_value=0, max_value=self.__n-1), st.integers(min_value=0, max_value=self.__n-1))))
+        self.__union_find.union_pairs([a for a, _ in pairs], [b for _, b in pairs])
+        for a, b in pairs:
+            self.__reference.union2(a, b)
+    
+    @rule()
+    def iterate(self):
+        assert sorted(self.__union_find) == sorted(sorted(group) for group in self.__reference)
+        assert len(self.__union_find) == len(self.__reference)
+
+TestIntegerUnionFind = IntegerUnionFindRules.TestCase
+
+class BucketQueueRules(RuleBasedStateMachine):
+    def __init__(self):
+        super(BucketQueueRules, self).__init__()
+        self.initialize({})
+    
+    @rule(priorities=st.dictionaries(keys=st.integers(min_value=-20, max_value=20), values=st.sampled_from([0, 0.5, 1])))
+    def initialize(self, priorities):
+        self.__queue = curver.kernel.BucketQueue(priorities)
+        self.__reference = dict(priorities)
+    
+    @rule(item=st.integers(min_value=-20, max_value=20), priority=st.sampled_from([0, 0.5, 1]))
+    def set(self, item, priority):
+        self.__queue[item] = priority
+        self.__reference[item] = priority
+    
+    @rule()
+    def peek(self):
+        expected = min((item for item, priority in self.__reference.items() if priority), key=lambda item: (-self.__reference[item], item), default=None)
+        assert self.__queue.peek() == expected
+
+TestBucketQueue = BucketQueueRules.TestCase
+
+class RopeRules(RuleBasedStateMachine):
+    Ropes = Bundle('ropes')
+    
+    @rule(target=Ropes, items=st.lists(elements=st.integers(), max_size=100))
+    def newrope(self, items):
+        rope = curver.kernel.Rope(items)
+        assert list(rope) == items
+        return rope
+    
+    @rule(target=Ropes, rope1=Ropes, rope2=Ropes)
+    def add(self, rope1, rope2):
+        added = rope1 + rope2
+        assert list(added) == list(rope1) + list(rope2)
+        assert added.height <= 2 * max(rope1.height, rope2.height) + 2
+        return added
+    
+    @rule(target=Ropes, rope=Ropes, factor=st.integers(min_value=0, max_value=10))
+    def multiply(self, rope, factor):
+        multiplied = rope * factor
+        assert list(multiplied) == list(rope) * factor
+        return multiplied
+    
+    @rule(target=Ropes, data=st.data(), rope=Ropes)
+    def getitem(self, data, rope):
+        start = data.draw(st.integers(min_value=-len(rope)-2, max_value=len(rope)+2))
+        stop = data.draw(st.integers(min_value=-len(rope)-2, max_value=len(rope)+2))
+        if len(rope) > 0:
+            index = data.draw(st.integers(min_value=-len(rope), max_value=len(rope)-1))
+            assert rope[index] == list(rope)[index]
+        sliced = rope[start:stop]
+        assert list(sliced) == list(rope)[start:stop]
+        return sliced
+    
+    @rule(target=Ropes, rope=Ropes)
+    def reverse(self, rope):
+        rev = rope.reverse(lambda x: ~x)
+        assert list(rev) == [~x for x in reversed(rope)]
+        assert list(reversed(rev)) == [~x for x in rope]
+        return rev
+
+TestRope = RopeRules.TestCase
+
 class SLPRules(RuleBasedStateMachine):
     SLPs = Bundle('slps')
     
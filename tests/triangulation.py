@@ -1,5 +1,6 @@
 
 import pickle
+import time
 import unittest
 
 from hypothesis import given
@@ -16,6 +17,23 @@ class TestTriangulation(unittest.TestCase):
     def test_pickle(self, triangulation):
         self.assertEqual(triangulation, pickle.loads(pickle.dumps(triangulation)))
     
+    @given(strategies.triangulations())
+    def test_interned(self, triangulation):
+        self.assertIs(triangulation, curver.triangulation_from_sig(triangulation.sig()))
+        self.assertIs(triangulation, pickle.loads(pickle.dumps(triangulation)))
+        self.assertIs(triangulation, curver.kernel.Triangulation(list(triangulation)).interned())
+    
+    @given(st.data())
+    def test_interned_lazily(self, data):
+        triangulation = data.draw(strategies.triangulations())
+        edge = data.draw(st.sampled_from([edge for edge in triangulation.edges if triangulation.is_flippable(edge)]))
+        flipped = triangulation.encode_flip(edge).target_triangulation
+        self.assertNotIn('_key', flipped.__dict__)  # Flipping does not intern.
+        back = flipped.encode_flip(~edge).target_triangulation
+        self.assertEqual(hash(back), hash(triangulation))
+        self.assertIs(back.interned(), triangulation)
+        self.assertIs(back.__dict__, triangulation.__dict__)  # So everything memoized is shared.
+    
     @given(st.data())
     def test_hash(self, data):
         triangulation1 = data.draw(strategies.triangulations())
@@ -29,16 +47,107 @@ class TestTriangulation(unittest.TestCase):
         isometries = triangulation.self_isometries()
         self.assertIn(identity, isometries)
     
+    @given(st.data())
+    def test_iso_sig(self, data):
+        triangulation = data.draw(strategies.triangulations())
+        perm = data.draw(strategies.permutations(triangulation.zeta))
+        signs = data.draw(st.lists(st.booleans(), min_size=triangulation.zeta, max_size=triangulation.zeta))
+        relabel = triangulation.encode_relabel_edges([~i if sign else i for i, sign in zip(perm, signs)])
+        relabelled = relabel.target_triangulation
+        self.assertEqual(triangulation.iso_sig(), relabelled.iso_sig())
+        self.assertTrue(triangulation.is_isometric_to(relabelled))
+        self.assertIn(relabel[0], triangulation.isometries_to(relabelled))
+        self.assertEqual(triangulation.first_isometry_to(relabelled).target_triangulation, relabelled)
+        
+        if triangulation.is_connected():
+            self.assertTrue(triangulation.is_isometric_to(curver.triangulation_from_sig(triangulation.iso_sig())))
+            brute_force = []
+            for label in triangulation.labels:
+                try:
+                    brute_force.append(triangulation.find_isometry(relabelled, {0: label}))
+                except ValueError:
+                    pass
+            self.assertEqual(len(triangulation.isometries_to(relabelled)), len(brute_force))
+    
     @given(strategies.triangulations())
     def test_sig(self, triangulation):
         self.assertEqual(triangulation, curver.triangulation_from_sig(triangulation.sig()))
     
+    @given(strategies.triangulations())
+    def test_lookups(self, triangulation):
+        for edge in triangulation.edges:
+            self.assertIn(edge, triangulation.triangle_lookup[edge])
+            self.assertIn(edge, triangulation.vertex_lookup[edge])
+            self.assertEqual(triangulation.corner_lookup[edge][0], edge)
+            self.assertEqual(triangulation.corner_lookup[edge], triangulation.corner_lookup[edge.label])
+            self.assertEqual(set(triangulation.corner_lookup[edge]), set(triangulation.triangle_lookup[edge]))
+    
+    @given(st.data())
+    def test_flip(self, data):
+        triangulation = data.draw(strategies.triangulations())
+        edge = data.draw(st.sampled_from([edge for edge in triangulation.edges if triangulation.is_flippable(edge)]))
+        flipped = triangulation.encode_flip(edge).target_triangulation
+        rebuilt = curver.create_triangulation(*flipped.package())  # From scratch.
+        self.assertEqual(flipped, rebuilt)
+        self.assertEqual(flipped.signature, rebuilt.signature)
+        self.assertEqual(flipped.vertices, rebuilt.vertices)
+        self.assertEqual(dict(flipped.vertex_lookup), dict(rebuilt.vertex_lookup))
+        self.assertEqual(dict(flipped.corner_lookup), dict(rebuilt.corner_lookup))
+        self.assertEqual(flipped.encode_flip(~edge).target_triangulation, triangulation)
+    
+    def test_flip_scaling(self):
+        def per_flip(genus):  # The one-vertex triangulation of S_{genus, 1} used by curver.load.
+            g = genus
+            triangulation = curver.create_triangulation(
+                [(5*i+0, 5*i+1, 5*i+2) for i in range(g)]
+                + [(~(5*i+1), 5*i+3, 5*i+4) for i in range(g)]
+                + [(~(5*i+2), ~(5*i+3), ~(5*i+4)) for i in range(g)]
+                + [(~0, ~5, 5*g)]
+                + [(5*g+1+i, ~(5*g+i), ~(5*i+10)) for i in range(g-4)]
+                + [(~(5*g+g-4), ~(5*g-10), ~(5*g-5))]
+                )
+            triangulation.vertex_lookup, triangulation.triangles  # pylint: disable=pointless-statement
+            best = None
+            for _ in range(3):
+                start = time.perf_counter()
+                current = triangulation
+                for index in range(200):
+                    label = index % current.zeta
+                    if current.is_flippable(label):
+                        current = current.encode_flip(label).target_triangulation
+                best = min(best or float('inf'), (time.perf_counter() - start) / 200)
+            self.assertNotIn('_vertex', current.__dict__)  # Derived tables are left to be rebuilt lazily.
+            self.assertNotIn('triangles', current.__dict__)
+            return best
+        
+        # The surface with ten times as many edges should not make flips (anywhere near) ten times slower.
+        self.assertLess(per_flip(50), 4 * per_flip(5))
+    
+    @given(strategies.triangulations())
+    def test_explore(self, triangulation):
+        shortest = dict()
+        for encoding in triangulation.all_encodings(2):
+            target = encoding.target_triangulation
+            shortest[target] = min(shortest.get(target, len(encoding)), len(encoding))
+        explored = list(triangulation.explore(2))
+        self.assertEqual(len(explored), len(shortest))
+        self.assertEqual(dict((encoding.target_triangulation, len(encoding)) for encoding in explored), shortest)
+        self.assertEqual(set(encoding.target_triangulation.iso_sig() for encoding in triangulation.explore(2, up_to_isometry=True)), set(target.iso_sig() for target in shortest))
+    
     @given(strategies.triangulations())
     def test_homology(self, triangulation):
         self.assertEqual(len(triangulation.homology_basis()), 1 - triangulation.euler_characteristic)  # Assumes connected.
     
     @given(strategies.triangulations())
     def test_connected(self, triangulation):
-        for encoding in triangulation.all_encodings(1):
+        for encoding in triangulation.explore(1):
             self.assertEqual(triangulation.is_connected(), encoding.target_triangulation.is_connected())
-
+    
+    @given(strategies.triangulations())
+    def test_pachner_1_3(self, triangulation):
+        h = triangulation.encode_pachner_1_3()  # Uses utilities.half.
+        curves = [triangulation.edge_curve(edge) for edge in triangulation.edges]
+        images = [h(curve) for curve in curves]
+        self.assertTrue(all(isinstance(image, curver.kernel.Curve) for image in images))
+        batch = curver.kernel.LaminationBatch.from_laminations(triangulation, curves)
+        self.assertEqual(h(batch).laminations(), images)
@@ -1,4 +1,5 @@
 
+from itertools import chain, permutations, product
 from string import ascii_lowercase
 import unittest
 
@@ -25,4 +26,26 @@ class TestMisc(unittest.TestCase):
         integers = data.draw(st.lists(elements=st.integers(max_value=bound), min_size=1))
         value = curver.kernel.utilities.maximum(integers, upper_bound=bound)
         self.assertEqual(value, min(max(integers), bound))
-
+    
+    @given(st.data())
+    def test_canonical_form(self, data):
+        n = data.draw(st.integers(min_value=1, max_value=6))
+        upper = {(i, j): sorted(data.draw(st.lists(st.integers(min_value=0, max_value=2), max_size=2))) for i in range(n) for j in range(i, n)}
+        matrix = [[upper[min(i, j), max(i, j)] for j in range(n)] for i in range(n)]
+        sizes = data.draw(st.lists(st.integers(min_value=1, max_value=n), min_size=1).filter(lambda sizes: sum(sizes) >= n))
+        starts = [sum(sizes[:k]) for k in range(len(sizes)) if sum(sizes[:k]) < n]
+        cells = [list(range(start, min(start + size, n))) for start, size in zip(starts, sizes)]
+        marks = data.draw(st.lists(st.integers(min_value=0, max_value=1), min_size=n, max_size=n))
+        
+        def markings(perm):
+            return [marks[i] for i in perm]
+        
+        def preserves_markings(automorphism):
+            return all(marks[automorphism[i]] == marks[i] for i in range(n))
+        
+        expected = min(
+            ([matrix[perm[i]][perm[j]] for i in range(n) for j in range(i, n)], markings(perm))
+            for X in product(*(permutations(cell) for cell in cells))
+            for perm in [list(chain(*X))]
+            )
+        self.assertEqual(curver.kernel.utilities.canonical_form(cells, matrix, markings, preserves_markings), expected)